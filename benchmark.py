@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from simulation import Config, Simulation
+
+DEFAULT_SIZES = [270, 1000, 5000, 20000, 50000]  # Total dots, split evenly over the three groups
+
+# Phase name -> methods of Simulation (or Game) whose time counts towards it
+PHASES = {
+    'targets': ['update_targets'],
+    'movement': ['move_towards_target', 'move_strategically', 'force_towards_circle'],
+    'collisions': ['handle_collisions'],
+    'bonus': ['handle_bonus_collisions'],
+    'draw': ['draw'],
+}
+
+def make_match(dots, seed, draw, strategic=False):
+    """Build a match with about `dots` dots, as a Game if it is to be drawn."""
+    config = Config(initial_dots_per_group=max(1, dots // 3))
+    if draw:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        from main import Game
+        return Game(seed, strategic=strategic, config=config)
+    return Simulation(seed, strategic, config)
+
+def instrument(match, phases):
+    """Wrap the phase methods of one match so each tick's time per phase is recorded."""
+    current = defaultdict(float)
+
+    def timed(phase, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                current[phase] += time.perf_counter() - start
+        return wrapper
+
+    for phase in phases:
+        for name in PHASES[phase]:
+            setattr(match, name, timed(phase, getattr(match, name)))
+    return current
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    if len(samples) == 0:
+        return None
+    return {
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'max_ms': float(samples.max()),
+    }
+
+def benchmark_size(dots, ticks=200, warmup=10, seed=0, draw=True, memory_ticks=20, strategic=False):
+    """Time `ticks` ticks of one match with about `dots` dots.
+
+    Returns ticks/sec, latency percentiles of every phase and of the whole
+    tick, and the peak memory traced while setting up a match and running
+    memory_ticks ticks. Memory is traced in a separate run, so tracing does
+    not slow down the timed one.
+
+    A match that is won, which at high densities can take a tick or two,
+    is replaced by a fresh one outside the timing, so every timed tick
+    plays all phases. Statistics without samples are None.
+    """
+    phases = [phase for phase in PHASES if draw or phase != 'draw']
+
+    match = make_match(dots, seed, draw, strategic)
+    initial_dots = len(match.dots)
+    current = instrument(match, phases)
+    samples = defaultdict(list)
+    tick_samples = []
+    matches = 1
+    for tick in range(warmup + ticks):
+        if match.winner:
+            match.reset_game()
+            matches += 1
+        current.clear()
+        start = time.perf_counter()
+        match.step()
+        if draw:
+            match.draw()
+        elapsed = time.perf_counter() - start
+        if tick >= warmup:
+            tick_samples.append(elapsed)
+            for phase in phases:
+                samples[phase].append(current[phase])
+
+    tracemalloc.start()
+    try:
+        memory_match = make_match(dots, seed, draw, strategic)
+        for _ in range(memory_ticks):
+            memory_match.step()
+            if draw:
+                memory_match.draw()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'dots': initial_dots,
+        'ticks': len(tick_samples),
+        'matches': matches,
+        'ticks_per_sec': len(tick_samples) / sum(tick_samples) if tick_samples else None,
+        'tick': percentiles(tick_samples),
+        'phases': {phase: percentiles(samples[phase]) for phase in phases},
+        'peak_memory_mb': peak / 2**20,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def format_result(result):
+    rate = result['ticks_per_sec']
+    parts = [f"{result['dots']:>6} dots: " + (f"{rate:8.1f} ticks/s" if rate is not None else "no ticks timed")]
+    if result['matches'] > 1:
+        parts.append(f"{result['matches']} matches")
+    for phase, stats in result['phases'].items():
+        if stats:
+            parts.append(f"{phase} {stats['p50_ms']:.2f}/{stats['p99_ms']:.2f}ms")
+    parts.append(f"peak {result['peak_memory_mb']:.1f}MB")
+    return ", ".join(parts)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the simulation and rendering phases at growing populations.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="total dots per run")
+    parser.add_argument('--ticks', type=int, default=200, help="timed ticks per population size")
+    parser.add_argument('--warmup', type=int, default=10, help="untimed ticks before timing starts")
+    parser.add_argument('--memory-ticks', type=int, default=20, help="ticks run while tracing memory")
+    parser.add_argument('--seed', type=int, default=0, help="seed of every benchmark match")
+    parser.add_argument('--no-draw', action='store_true', help="benchmark the headless simulation only")
+    parser.add_argument('--strategic', action='store_true', help="benchmark the strategic movement rules")
+    parser.add_argument('--output', default='benchmark.json', help="file to save the results to as JSON")
+    args = parser.parse_args()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'ticks': args.ticks,
+        'seed': args.seed,
+        'strategic': args.strategic,
+        'results': [],
+    }
+    print("phase latencies are p50/p99")
+    for dots in args.sizes:
+        result = benchmark_size(dots, args.ticks, args.warmup, args.seed, not args.no_draw, args.memory_ticks,
+                                args.strategic)
+        report['results'].append(result)
+        print(format_result(result), flush=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved to {args.output}")
@@ -0,0 +1,164 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+from PIL import Image
+
+from simulation import Config, parse_setting
+
+CAPTURE_WORKERS = 2  # Encoder threads
+CAPTURE_POOL = 8     # Frames copied and waiting to be encoded at most; further frames are skipped
+# Pooled frames are plain 32-bit surfaces, which PIL reads as BGRX on little-endian machines
+CAPTURE_MASKS = (0xff0000, 0x00ff00, 0x0000ff, 0)
+CAPTURE_RAWMODE = 'BGRX' if sys.byteorder == 'little' else 'XRGB'
+
+class FrameCapture:
+    """Save drawn frames as numbered PNG files or one animated GIF.
+
+    capture() only copies the screen into a free surface from a fixed
+    pool, with one blit; the frame is turned into a PIL image and encoded
+    on a pool of threads, reading the surface's pixel buffer directly.
+    When every pooled surface is still waiting to be encoded the frame is
+    skipped, so a slow encoder never holds up the match; with `block` set
+    it waits instead, for offline rendering where every frame counts.
+
+    A path ending in .gif gives an animated GIF, which is written when
+    the capture is closed and holds every frame in memory until then, so
+    it suits short clips. Any other path is a directory of PNG files.
+    """
+
+    def __init__(self, path, every=1, fps=60, workers=CAPTURE_WORKERS, pool=CAPTURE_POOL, block=False):
+        if every < 1:
+            raise ValueError(f"every must be at least 1, not {every}")
+        self.path = path
+        self.gif = path.lower().endswith('.gif')
+        if not self.gif:
+            os.makedirs(path, exist_ok=True)
+        self.every = every
+        self.duration = 1000 * every / fps  # Milliseconds each captured frame is shown for
+        self.block = block
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='capture')
+        self.free = []
+        self.available = threading.Semaphore(pool)
+        self.lock = threading.Lock()
+        self.gif_frames = {}
+        self.error = None
+        self.frames = 0    # Frames offered to capture()
+        self.captured = 0  # Frames handed to the encoders
+        self.dropped = 0   # Frames skipped because the encoders were behind
+
+    def capture(self, screen):
+        """Queue a copy of screen for encoding, unless this frame is skipped."""
+        number = self.frames
+        self.frames += 1
+        if number % self.every:
+            return
+        if not self.available.acquire(blocking=self.block):
+            self.dropped += 1
+            return
+
+        with self.lock:
+            surface = self.free.pop() if self.free else None
+        if surface is None:
+            surface = pygame.Surface(screen.get_size(), 0, 32, CAPTURE_MASKS)
+        surface.blit(screen, (0, 0))
+        self.executor.submit(self.encode, surface, self.captured)
+        self.captured += 1
+
+    def encode(self, surface, index):
+        try:
+            # PIL converts straight from the surface's pixels; the surface is free again right after
+            image = Image.frombuffer('RGB', surface.get_size(), surface.get_buffer(), 'raw',
+                                     CAPTURE_RAWMODE, surface.get_pitch(), 1)
+        finally:
+            with self.lock:
+                self.free.append(surface)
+            self.available.release()
+
+        try:
+            if self.gif:
+                frame = image.quantize(colors=256)
+                with self.lock:
+                    self.gif_frames[index] = frame
+            else:
+                image.save(os.path.join(self.path, f'frame_{index:06d}.png'))
+        except Exception as error:
+            # Reported by close(), as nothing waits on the encoders before that
+            self.error = self.error or error
+
+    def close(self):
+        """Wait for every queued frame to be encoded and write the GIF, if any."""
+        if self.executor is None:
+            return
+        self.executor.shutdown(wait=True)
+        self.executor = None
+        if self.error:
+            raise self.error
+        if self.gif and self.gif_frames:
+            frames = [self.gif_frames[index] for index in sorted(self.gif_frames)]
+            frames[0].save(self.path, save_all=True, append_images=frames[1:],
+                           duration=round(self.duration), loop=0)
+            self.gif_frames = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def render_match(path, seed=None, max_ticks=20000, every=1, workers=CAPTURE_WORKERS, config=None,
+                 strategic=False):
+    """Play one match without a window, saving a frame after every tick.
+
+    Nothing waits on a clock, so this runs as fast as drawing and encoding
+    allow. The match ends once a winner has been shown for the restart delay.
+    config and strategic choose the rules, as for Simulation.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from main import RESTART_DELAY, Game
+    from simulation import TICK_RATE
+
+    game = Game(seed, strategic=strategic, config=config)
+    try:
+        with FrameCapture(path, every, TICK_RATE, workers, block=True) as capture:
+            game.draw()
+            capture.capture(game.screen)
+            while game.ticks < max_ticks and not (game.winner and game.ticks - game.winner_tick >= RESTART_DELAY):
+                game.tick()
+                game.draw()
+                capture.capture(game.screen)
+    finally:
+        game.close()
+    return game, capture
+
+def positive_int(text):
+    """Parse a whole number of at least 1, for --every options."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render a match without a window to PNG frames (a directory) or an animated GIF.")
+    parser.add_argument('output', help="directory for PNG frames, or a file name ending in .gif")
+    parser.add_argument('--seed', type=int, default=None, help="seed of the match")
+    parser.add_argument('--max-ticks', type=int, default=20000, help="stop after this many ticks")
+    parser.add_argument('--every', type=positive_int, default=1,
+                        help="save every Nth tick; GIF viewers slow down frames shorter than 20 ms, so use 2+")
+    parser.add_argument('--workers', type=positive_int, default=CAPTURE_WORKERS, help="encoder threads")
+    parser.add_argument('--strategic', action='store_true', help="use the strategic movement rules")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule, e.g. --set flee_threshold=200")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    game, capture = render_match(args.output, args.seed, args.max_ticks, args.every, args.workers,
+                                 Config(**dict(args.set)), args.strategic)
+    elapsed = time.perf_counter() - start
+    print(f"Saved {capture.captured} frames of {game.ticks} ticks "
+          f"({game.winner or 'undecided'}) to {args.output} in {elapsed:.1f}s")
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from simulation import GROUPS, Config, Simulation, parse_setting
+
+# File layout:
+#   header    MAGIC, version, metadata length
+#   metadata  JSON: match scalars, RNG state and where each array is stored
+#   arrays    raw little-endian column arrays, from the first ALIGNMENT boundary after
+#             the metadata, each at an offset (relative to there) that is a multiple of ALIGNMENT
+# The dot columns are the Swarm fields, the bonus disk columns the BonusDisks
+# arrays including picked disks not yet dropped, so a resumed match goes on
+# exactly as the saved one would have.
+MAGIC = b'SPRCHKPT'
+VERSION = 1
+HEADER = struct.Struct('<8sHI')
+ALIGNMENT = 64
+
+def save(sim, path):
+    """Write the full state of sim (a Simulation or Game) to path.
+
+    The file is written next to path and renamed over it once complete,
+    so a crash while saving leaves the previous checkpoint intact.
+    """
+    dots = sim.dots
+    disks = sim.bonus_disks
+    arrays = {f'dots.{name}': getattr(dots, name) for name, _, _ in dots.FIELDS}
+    arrays.update({'bonus.x': disks.x, 'bonus.y': disks.y, 'bonus.alive': disks.alive})
+
+    metadata = {
+        'match': sim.match,
+        'ticks': sim.ticks,
+        'circle_center': list(sim.circle_center),
+        'circle_radius': sim.circle_radius,
+        'bonus_spawned': [[threshold, spawned] for threshold, spawned in sim.bonus_spawned.items()],
+        'winner': sim.winner,
+        'winner_tick': sim.winner_tick,
+        'last_collision_tick': sim.last_collision_tick,
+        'conversions': sim.conversions.tolist(),
+        'pickups': sim.pickups,
+        'strategic': sim.strategic,
+        'config': sim.config.asdict(),
+        'rng': sim.rng.bit_generator.state,
+        'arrays': {},
+    }
+    offset = 0
+    for name, values in arrays.items():
+        metadata['arrays'][name] = {'dtype': values.dtype.newbyteorder('<').str, 'length': len(values),
+                                    'offset': offset}
+        offset += aligned(values.nbytes)
+    encoded = json.dumps(metadata).encode()
+    start = aligned(HEADER.size + len(encoded))
+
+    partial = path + '.partial'
+    with open(partial, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded)))
+        f.write(encoded)
+        for name, values in arrays.items():
+            entry = metadata['arrays'][name]
+            f.seek(start + entry['offset'])
+            np.ascontiguousarray(values, dtype=entry['dtype']).tofile(f)
+        f.truncate(start + offset)
+    os.replace(partial, path)
+
+def aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def read_metadata(path):
+    """Return the metadata of a checkpoint and the file offset its arrays are relative to."""
+    with open(path, 'rb') as f:
+        magic, version, length = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} checkpoint")
+        return json.loads(f.read(length)), aligned(HEADER.size + length)
+
+def read_config(path):
+    """Return the Config a checkpoint was saved with."""
+    metadata, _ = read_metadata(path)
+    return Config(**metadata['config'])
+
+def load(path, sim=None):
+    """Restore the state saved in path into sim, or into a new Simulation, and return it.
+
+    sim must have been created with the Config the checkpoint was saved
+    with (see read_config). The arrays are memory-mapped and copied
+    straight into the match's own storage, which is reused if it is large
+    enough.
+    """
+    metadata, start = read_metadata(path)
+    config = Config(**metadata['config'])
+    if sim is not None and sim.config != config:
+        raise ValueError(f"{path} was saved with different rules: {config}")
+    arrays = {}
+    for name, entry in metadata['arrays'].items():
+        if entry['length'] == 0:
+            arrays[name] = np.zeros(0, dtype=entry['dtype'])
+        else:
+            arrays[name] = np.memmap(path, dtype=entry['dtype'], mode='r',
+                                     offset=start + entry['offset'], shape=(entry['length'],))
+
+    if sim is None:
+        sim = Simulation(strategic=metadata['strategic'], config=config)
+    sim.strategic = metadata['strategic']
+    sim.rng.bit_generator.state = metadata['rng']
+    sim.dots.clear()
+    sim.dots.extend({name: arrays[f'dots.{name}'] for name, _, _ in sim.dots.FIELDS})
+    sim.bonus_disks.load(np.array(arrays['bonus.x']), np.array(arrays['bonus.y']),
+                         np.array(arrays['bonus.alive']))
+
+    sim.match = metadata.get('match', 0)
+    sim.ticks = metadata['ticks']
+    sim.circle_center = tuple(metadata['circle_center'])
+    sim.circle_radius = metadata['circle_radius']
+    sim.bonus_spawned = {threshold: spawned for threshold, spawned in metadata['bonus_spawned']}
+    sim.winner = metadata['winner']
+    sim.winner_tick = metadata['winner_tick']
+    sim.last_collision_tick = metadata['last_collision_tick']
+    sim.conversions = np.array(metadata['conversions'], dtype=np.intp)
+    sim.pickups = metadata['pickups']
+    return sim
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play a long headless match, saving a checkpoint it can be resumed from.")
+    parser.add_argument('checkpoint', help="checkpoint file, resumed from if it exists")
+    parser.add_argument('--seed', type=int, default=None, help="seed of a new match")
+    parser.add_argument('--max-ticks', type=int, default=20000, help="stop at this tick")
+    parser.add_argument('--every', type=int, default=1000, help="ticks between checkpoints")
+    parser.add_argument('--strategic', action='store_true', help="use the strategic movement in a new match")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule of a new match, e.g. --set flee_threshold=200")
+    args = parser.parse_args()
+
+    if os.path.exists(args.checkpoint):
+        start = time.perf_counter()
+        sim = load(args.checkpoint)
+        print(f"Resumed at tick {sim.ticks} with {len(sim.dots)} dots "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    else:
+        sim = Simulation(args.seed, args.strategic, Config(**dict(args.set)))
+
+    while sim.ticks < args.max_ticks and not sim.winner:
+        sim.step()
+        if sim.ticks % args.every == 0 or sim.winner:
+            start = time.perf_counter()
+            save(sim, args.checkpoint)
+            populations = dict(zip(GROUPS, sim.dots.counts.tolist()))
+            print(f"Tick {sim.ticks}: {populations}, saved in {(time.perf_counter() - start) * 1000:.1f} ms",
+                  flush=True)
+    print(f"{sim.winner or 'undecided'} after {sim.ticks} ticks")
@@ -1,29 +1,46 @@
+import argparse
+import threading
+import time
+
 import pygame
 import numpy as np
-import random
-import math
-from PIL import Image
+
+import checkpoint
+from capture import FrameCapture, positive_int
+from profiler import FrameProfiler
+from replay import ReplayReader, ReplayWriter
+from snapshot import Snapshot, SnapshotExchange
+from telemetry import TelemetrySink, sample
+from simulation import (
+    BONUS_RADIUS,
+    DOT_RADIUS,
+    GROUPS,
+    TICK_RATE,
+    WINDOW_HEIGHT,
+    WINDOW_WIDTH,
+    Config,
+    Simulation,
+    parse_setting,
+)
 
 # Initialize Pygame
 pygame.init()
 pygame.font.init()
 
 # Constants
-WINDOW_WIDTH = 960
-WINDOW_HEIGHT = 960
-DOT_RADIUS = 8
-BONUS_RADIUS = 6
-GLOBAL_MIN_SPEED = 0.1
-GLOBAL_MAX_SPEED = 1.2
-MIN_SPEED_RANGE = 0.3  # Minimum gap between min and max speed of a dot
-EATING_DISTANCE = 12  # Reduced from 15 to make eating harder
-CHASE_THRESHOLD = 300  # Reduced from 400 to make chasing more strategic
-FLEE_THRESHOLD = 150  # Increased from 100 to make dots more cautious
-INITIAL_DOTS_PER_GROUP = 90
-CIRCLE_SHRINK_SPEED = 0.4  # Reduced from 0.6 to give more time for strategy
-OUTSIDE_CIRCLE_FORCE = 8  # Reduced from 10 to make boundary less harsh
-INITIAL_CIRCLE_RADIUS = 660
-RESTART_DELAY = 5000  # 5 seconds in milliseconds
+RESTART_DELAY = 5 * TICK_RATE  # 5 seconds in ticks
+FRAME_RATE = 60  # Frames drawn per second, independent of the simulation tick rate
+MAX_CATCH_UP_TICKS = 16  # Most ticks played in one frame; beyond that the match slows down instead
+SPRITE_ROTATIONS = 64  # Pre-rotated copies of each shape, about 5.6 degrees apart
+MAX_DIRTY_RECTS = 2000  # Above this many changed rects per frame, redraw and flip the whole screen
+LOD_THRESHOLD = 5000  # Above this many dots, draw a density map instead of one sprite per dot
+LOD_CELL_SIZE = 4     # Pixels per side of a density map cell
+LOD_SATURATION = 4    # Dots in a cell at which it is drawn fully opaque
+REPLAY_SEEK_FRAMES = 5 * TICK_RATE  # Arrow keys jump 5 seconds in a replay
+PROFILER_PHASES = ['events', 'targets', 'movement', 'collisions', 'bonus',
+                   'background', 'arena', 'sprites', 'hud', 'present']
+PROFILER_GRAPH_WIDTH = 280   # One pixel column per frame
+PROFILER_GRAPH_HEIGHT = 100  # Twice the frame budget
 
 # Colors (Monet-inspired palette)
 WATER_BLUE = (142, 190, 216)     # Light blue from water lilies
@@ -44,309 +61,68 @@ CIRCLE_COLOR = LAVENDER
 PURPLE = (180, 160, 210)    # Softer purple for bonus disks
 YELLOW = SUNSET_GOLD
 
-# Speed distribution parameters
-POISSON_MEAN_A = 1.0  # Mean for group A's max speed
-POISSON_MEAN_B = 1.0  # Mean for group B's max speed
-POISSON_MEAN_C = 1.0  # Mean for group C's max speed
+# One color per profiler phase, in PROFILER_PHASES order
+PROFILER_COLORS = [
+    (120, 120, 120),  # events
+    (214, 39, 40),    # targets
+    (255, 127, 14),   # movement
+    (188, 189, 34),   # collisions
+    (148, 103, 189),  # bonus
+    (23, 190, 207),   # background
+    (31, 119, 180),   # arena
+    (44, 160, 44),    # sprites
+    (227, 119, 194),  # hud
+    (140, 86, 75),    # present
+]
 
 # Font setup
 FONT_LARGE = pygame.font.Font(None, 74)
 FONT_MEDIUM = pygame.font.Font(None, 48)
+FONT_SMALL = pygame.font.Font(None, 18)
 
-class Dot:
-    def __init__(self, x, y, group):
-        self.x = x
-        self.y = y
-        self.group = group
-        self.target = None
-        
-        # Initialize speed range based on Poisson distribution
-        poisson_means = {
-            'A': POISSON_MEAN_A,
-            'B': POISSON_MEAN_B,
-            'C': POISSON_MEAN_C
-        }
-        
-        # Generate max speed using Poisson distribution
-        max_speed = min(GLOBAL_MAX_SPEED, 
-                       max(GLOBAL_MIN_SPEED + MIN_SPEED_RANGE,
-                           np.random.poisson(poisson_means[group]) / 5))  # Divide by 5 to scale to our speed range
-        
-        # Generate min speed ensuring minimum gap
-        available_min = max(GLOBAL_MIN_SPEED, max_speed - 1.4)  # Ensure within global range
-        available_max = max_speed - MIN_SPEED_RANGE  # Ensure minimum gap
-        self.min_speed = random.uniform(available_min, available_max)
-        self.max_speed = max_speed
-        
-        # Initialize current speed within the dot's range
-        self.speed = random.uniform(self.min_speed, self.max_speed)
-        self.base_speed = self.speed  # Store original speed for reference
-        
-        self.direction = random.uniform(0, 2 * math.pi)
-        self.fleeing = False
-        self.bonus_target = None
-        self.momentum_x = 0
-        self.momentum_y = 0
-        self.momentum_decay = 0.95
-        self.stalemate_timer = 0
-        self.last_angle = 0
-        self.bonus_multiplier = 1
-        self.bonus_time = 0
-        self.game_dots = []
-        self.strategic_timer = 0  # Timer for strategic decision making
-
-    def get_image(self):
-        return {
-            'A': Game.scissors_img,
-            'B': Game.paper_img,
-            'C': Game.rock_img
-        }[self.group]
-
-    def can_eat(self, other):
-        return (
-            (self.group == 'A' and other.group == 'B') or
-            (self.group == 'B' and other.group == 'C') or
-            (self.group == 'C' and other.group == 'A')
-        )
-
-    def distance_to(self, other):
-        return math.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
-
-    def count_population(self):
-        populations = {'A': 0, 'B': 0, 'C': 0}
-        for dot in self.game_dots:
-            populations[dot.group] += 1
-        return populations
-
-    def should_be_strategic(self, populations):
-        # Get the group that this dot can eat
-        prey_group = {'A': 'B', 'B': 'C', 'C': 'A'}[self.group]
-        # Get the group that can eat this dot
-        predator_group = {'A': 'C', 'B': 'A', 'C': 'B'}[self.group]
-        
-        total_dots = sum(populations.values())
-        if total_dots == 0:
-            return False
-            
-        prey_ratio = populations[prey_group] / total_dots
-        predator_ratio = populations[predator_group] / total_dots
-        my_ratio = populations[self.group] / total_dots
-        
-        # Enhanced strategic conditions
-        CRITICAL_POPULATION = 15  # Increased threshold for strategic behavior
-        CRITICAL_RATIO = 0.25    # Increased ratio threshold
-        ULTRA_PROTECTIVE_THRESHOLD = 8  # New threshold for ultra-protective behavior
-        
-        return (
-            populations[prey_group] < CRITICAL_POPULATION or  # Prey population is low
-            prey_ratio < CRITICAL_RATIO or                   # Prey ratio is low
-            predator_ratio > 0.4 or                         # Many predators
-            min(populations.values()) < ULTRA_PROTECTIVE_THRESHOLD or  # Any group is endangered
-            my_ratio > 0.5 or                              # We're becoming too dominant
-            abs(populations[prey_group] - populations[predator_group]) < 5  # Balance is delicate
-        )
-
-    def get_strategic_movement(self, target_dx, target_dy, distance, populations):
-        dx = dy = 0
-        prey_group = {'A': 'B', 'B': 'C', 'C': 'A'}[self.group]
-        
-        # Calculate the center of the arena
-        center_x = WINDOW_WIDTH / 2
-        center_y = WINDOW_HEIGHT / 2
-        
-        # More sophisticated strategic movement
-        if populations[prey_group] < ULTRA_PROTECTIVE_THRESHOLD:  # Ultra-protective of last few prey
-            if distance < CHASE_THRESHOLD:
-                # Actively avoid the last remaining prey
-                dx = -(target_dx/distance) * self.speed * 1.2
-                dy = -(target_dy/distance) * self.speed * 1.2
-                
-                # Move towards the center if too far from it
-                to_center_x = center_x - self.x
-                to_center_y = center_y - self.y
-                center_dist = math.sqrt(to_center_x**2 + to_center_y**2)
-                if center_dist > WINDOW_WIDTH/4:
-                    dx += (to_center_x/center_dist) * self.speed * 0.4
-                    dy += (to_center_y/center_dist) * self.speed * 0.4
-        
-        elif populations[prey_group] < CRITICAL_POPULATION:  # Protective behavior
-            if distance < EATING_DISTANCE * 4:
-                # Move sideways relative to prey
-                perpendicular_x = -target_dy/distance
-                perpendicular_y = target_dx/distance
-                dx = perpendicular_x * self.speed * 0.8
-                dy = perpendicular_y * self.speed * 0.8
-            elif distance < CHASE_THRESHOLD:
-                # Maintain distance without approaching
-                dx = (target_dx/distance) * self.speed * 0.2
-                dy = (target_dy/distance) * self.speed * 0.2
-        
-        else:  # Normal strategic behavior
-            if distance < CHASE_THRESHOLD:
-                # Keep moderate distance and move more unpredictably
-                dx = (target_dx/distance) * self.speed * 0.4
-                dy = (target_dy/distance) * self.speed * 0.4
-                
-                # Add circular movement
-                if random.random() < 0.3:
-                    perpendicular_x = -target_dy/distance
-                    perpendicular_y = target_dx/distance
-                    dx += perpendicular_x * self.speed * 0.3
-                    dy += perpendicular_y * self.speed * 0.3
-        
-        # Add some randomness to prevent predictable patterns
-        if random.random() < 0.15:
-            dx += random.uniform(-0.3, 0.3) * self.speed
-            dy += random.uniform(-0.3, 0.3) * self.speed
-        
-        return dx, dy
-
-    def adjust_speed(self):
-        # Randomly adjust speed within dot's personal range
-        if random.random() < 0.05:  # 5% chance to change speed each frame
-            speed_change = random.uniform(-0.1, 0.1)
-            new_speed = self.speed + speed_change
-            # Ensure speed stays within dot's personal range
-            self.speed = max(self.min_speed, min(self.max_speed, new_speed))
-
-    def move_towards_target(self):
-        # Add speed adjustment at the start of movement
-        self.adjust_speed()
-        
-        populations = self.count_population()
-        being_strategic = self.should_be_strategic(populations)
-        
-        base_movement_x = math.cos(self.direction) * self.speed * 0.3
-        base_movement_y = math.sin(self.direction) * self.speed * 0.3
-
-        dx = dy = 0
-
-        nearby_groups = set()
-        for dot in self.game_dots:
-            if dot != self and self.distance_to(dot) < CHASE_THRESHOLD * 0.5:
-                nearby_groups.add(dot.group)
-
-        if len(nearby_groups) == 2 and self.group not in nearby_groups:
-            self.stalemate_timer += 1
-        else:
-            self.stalemate_timer = max(0, self.stalemate_timer - 1)
-
-        if self.stalemate_timer > 60:
-            if random.random() < 0.1:
-                burst_angle = random.uniform(0, 2 * math.pi)
-                self.momentum_x += math.cos(burst_angle) * self.speed * 2
-                self.momentum_y += math.sin(burst_angle) * self.speed * 2
-                self.stalemate_timer = 0
-
-        if self.bonus_target:
-            bonus_dx = self.bonus_target.x - self.x
-            bonus_dy = self.bonus_target.y - self.y
-            bonus_dist = math.sqrt(bonus_dx**2 + bonus_dy**2)
-            if bonus_dist > 0:
-                dx = (bonus_dx/bonus_dist) * self.speed * 1.5
-                dy = (bonus_dy/bonus_dist) * self.speed * 1.5
-        elif self.target is not None:
-            nearest_predator = None
-            nearest_pred_dist = float('inf')
-            for dot in self.game_dots:
-                if dot.can_eat(self):
-                    pred_dist = self.distance_to(dot)
-                    if pred_dist < nearest_pred_dist:
-                        nearest_predator = dot
-                        nearest_pred_dist = pred_dist
-
-            if nearest_predator and nearest_pred_dist < FLEE_THRESHOLD:
-                self.fleeing = True
-                flee_dx = self.x - nearest_predator.x
-                flee_dy = self.y - nearest_predator.y
-                flee_dist = math.sqrt(flee_dx**2 + flee_dy**2)
-                if flee_dist > 0:
-                    flee_multiplier = random.uniform(0.8, 1.2)
-                    dx = (flee_dx/flee_dist) * self.speed * flee_multiplier
-                    dy = (flee_dy/flee_dist) * self.speed * flee_multiplier
-            else:
-                self.fleeing = False
-                target_dx = self.target.x - self.x
-                target_dy = self.target.y - self.y
-                distance = math.sqrt(target_dx**2 + target_dy**2)
-
-                if self.can_eat(self.target):
-                    if being_strategic:
-                        # Get strategic movement based on population state
-                        dx, dy = self.get_strategic_movement(target_dx, target_dy, distance, populations)
-                    else:
-                        # Normal hunting behavior
-                        if distance > 0 and distance < CHASE_THRESHOLD:
-                            dx = (target_dx/distance) * self.speed
-                            dy = (target_dy/distance) * self.speed
-
-        # Add some randomness to movement when being strategic
-        if being_strategic:
-            if random.random() < 0.15:  # Increased randomness
-                dx += random.uniform(-0.7, 0.7) * self.speed  # More random movement
-                dy += random.uniform(-0.7, 0.7) * self.speed
-
-        self.momentum_x = self.momentum_x * self.momentum_decay
-        self.momentum_y = self.momentum_y * self.momentum_decay
-
-        self.momentum_x += random.uniform(-0.1, 0.1) * self.speed
-        self.momentum_y += random.uniform(-0.1, 0.1) * self.speed
-
-        self.x += base_movement_x + dx + self.momentum_x
-        self.y += base_movement_y + dy + self.momentum_y
-
-        if self.x <= DOT_RADIUS or self.x >= WINDOW_WIDTH - DOT_RADIUS:
-            self.direction = math.pi - self.direction
-            self.x = max(DOT_RADIUS, min(WINDOW_WIDTH - DOT_RADIUS, self.x))
-
-        if self.y <= DOT_RADIUS or self.y >= WINDOW_HEIGHT - DOT_RADIUS:
-            self.direction = -self.direction
-            self.y = max(DOT_RADIUS, min(WINDOW_HEIGHT - DOT_RADIUS, self.y))
-
-    def apply_bonus(self):
-        self.bonus_multiplier = 5
-        self.bonus_time = pygame.time.get_ticks()
-
-    def update_bonus(self):
-        if self.bonus_multiplier > 1:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.bonus_time > 5000:  
-                self.bonus_multiplier = 1
-
-class BonusDisk:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = BONUS_RADIUS
-        self.color = PURPLE
-
-class Game:
-    def __init__(self):
+class Game(Simulation):
+    def __init__(self, seed=None, show_profiler=False, profile_output=None, record=None, telemetry=None,
+                 tick_rate=TICK_RATE, frame_rate=FRAME_RATE, strategic=False, lod_threshold=LOD_THRESHOLD,
+                 capture=None, capture_every=1, checkpoint_path=None, config=None):
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Scissors-Paper-Rock Battlefield")
-        self.reset_game()
-
-    def reset_game(self):
-        # Load and scale images
+        self.background = self.build_background()
+        self.arena = self.background.copy()
+        self.arena_radius = None
+        self.dirty_rects = []
+        # The state drawn by the single-threaded loop and replays; see run_threaded() for the other
+        self.frame = Snapshot()
+
+        # Crowds of more than lod_threshold dots are drawn as a density map, built at low resolution
+        self.lod_threshold = lod_threshold
+        self.density = pygame.Surface((WINDOW_WIDTH // LOD_CELL_SIZE, WINDOW_HEIGHT // LOD_CELL_SIZE),
+                                      pygame.SRCALPHA)
+        self.density_scaled = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+
+        # Ticks are played at tick_rate per second of real time, whatever the frame rate
+        self.tick_rate = tick_rate
+        self.frame_rate = frame_rate
+
+        # Frame profiler, shown or hidden with F3
+        self.profiler = FrameProfiler(PROFILER_PHASES, PROFILER_GRAPH_WIDTH, 1 / frame_rate)
+        if profile_output:
+            self.profiler.open_export(profile_output)
+        self.show_profiler = show_profiler
+
+        # Every tick of every match is written here, if recording
+        self.recorder = ReplayWriter(record) if record else None
+        self.telemetry = TelemetrySink(telemetry) if telemetry else None
+        # Drawn frames are saved here, if capturing, skipping frames rather than slowing the match down
+        self.capture = FrameCapture(capture, capture_every, frame_rate) if capture else None
+        # The match is saved here when the window is closed, to be resumed later
+        self.checkpoint_path = checkpoint_path
+        self.profiler_graph = pygame.Surface((PROFILER_GRAPH_WIDTH, PROFILER_GRAPH_HEIGHT)).convert()
+
+        # Assets are loaded once and shared by every match
         self.load_images()
-        
         self.clock = pygame.time.Clock()
-        self.dots = []
-        self.circle_center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-        self.circle_radius = INITIAL_CIRCLE_RADIUS
-        self.bonus_disks = []
-        self.bonus_spawned = {
-            0.7: False,
-            0.8: False,
-            0.6: False,
-            0.4: False
-        }
-        self.winner = None
-        self.winner_time = 0
         self.font = pygame.font.Font(None, 24)  # Add font for status table
-        self.initialize_dots()
-        for dot in self.dots:
-            dot.game_dots = self.dots
+        super().__init__(seed, strategic, config)
 
     def load_images(self):
         try:
@@ -383,164 +159,54 @@ class Game:
             Game.paper_img = self.create_fallback_surface(GREEN)
             Game.rock_img = self.create_fallback_surface(BLUE)
 
+        self.build_sprite_atlas()
+        self.build_bonus_sprite()
+
+    def build_sprite_atlas(self):
+        # Rotate every shape once up front so drawing a dot is only a lookup and a blit
+        Game.sprite_atlas = []
+        Game.sprite_offsets = np.zeros((len(GROUPS), SPRITE_ROTATIONS, 2), dtype=int)
+        for group, img in enumerate([Game.scissors_img, Game.paper_img, Game.rock_img]):
+            rotations = []
+            for step in range(SPRITE_ROTATIONS):
+                rotated_img = pygame.transform.rotate(img, step * 360 / SPRITE_ROTATIONS)
+                rotations.append(rotated_img)
+                # Offset from a dot's center to the top-left corner of its rotated sprite
+                Game.sprite_offsets[group, step] = (rotated_img.get_width() // 2, rotated_img.get_height() // 2)
+            Game.sprite_atlas.append(rotations)
+        # The same sprites as one flat object array, so a whole frame's sprites are picked by one index
+        Game.sprite_table = np.empty(len(GROUPS) * SPRITE_ROTATIONS, dtype=object)
+        Game.sprite_table[:] = [rotated_img for rotations in Game.sprite_atlas for rotated_img in rotations]
+
+    def build_bonus_sprite(self):
+        # A bonus disk with its glow, drawn once; every disk is then a single blit
+        glow_radius = int(BONUS_RADIUS + 2)
+        size = 2 * glow_radius + 1
+        Game.bonus_img = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(Game.bonus_img, (PURPLE[0]//2, PURPLE[1]//2, PURPLE[2]//2),
+                           (glow_radius, glow_radius), glow_radius)
+        pygame.draw.circle(Game.bonus_img, PURPLE, (glow_radius, glow_radius), int(BONUS_RADIUS))
+        Game.bonus_offset = glow_radius
+
     def create_fallback_surface(self, color):
         size = int(DOT_RADIUS * 2)
         surface = pygame.Surface((size, size), pygame.SRCALPHA)
         pygame.draw.circle(surface, color, (size//2, size//2), size//2)
         return surface
 
-    def initialize_dots(self):
-        for group in ['A', 'B', 'C']:
-            for _ in range(INITIAL_DOTS_PER_GROUP):
-                x = random.randint(DOT_RADIUS, WINDOW_WIDTH - DOT_RADIUS)
-                y = random.randint(DOT_RADIUS, WINDOW_HEIGHT - DOT_RADIUS)
-                self.dots.append(Dot(x, y, group))
-
-    def spawn_bonus_disks(self, count=40):
-        for _ in range(count):
-            angle = random.uniform(0, 2 * math.pi)
-            distance = random.uniform(0, self.circle_radius)
-            x = self.circle_center[0] + distance * math.cos(angle)
-            y = self.circle_center[1] + distance * math.sin(angle)
-            self.bonus_disks.append(BonusDisk(x, y))
-
-    def handle_bonus_collisions(self):
-        for dot in self.dots:
-            for bonus in self.bonus_disks[:]:
-                if math.sqrt((dot.x - bonus.x)**2 + (dot.y - bonus.y)**2) < EATING_DISTANCE:
-                    dot.apply_bonus()
-                    new_dot = Dot(dot.x + random.uniform(-10, 10), dot.y + random.uniform(-10, 10), dot.group)
-                    new_dot.game_dots = self.dots
-                    self.dots.append(new_dot)
-                    self.bonus_disks.remove(bonus)
-
-    def update_targets(self):
-        for dot in self.dots:
-            closest_prey = None
-            closest_predator = None
-            min_prey_dist = float('inf')
-            min_predator_dist = float('inf')
-            
-            # Increase prey attraction and reduce predator fear
-            PREY_WEIGHT = 1.5      # Increased from 1.0 to make prey more attractive
-            PREDATOR_WEIGHT = 0.7  # Decreased from 1.0 to make predators less scary
-            
-            for other in self.dots:
-                if other == dot:
-                    continue
-                    
-                dx = other.x - dot.x
-                dy = other.y - dot.y
-                distance = math.sqrt(dx*dx + dy*dy)
-                
-                # Define prey and predator relationships
-                is_prey = (
-                    (dot.group == 'A' and other.group == 'B') or
-                    (dot.group == 'B' and other.group == 'C') or
-                    (dot.group == 'C' and other.group == 'A')
-                )
-                is_predator = (
-                    (dot.group == 'A' and other.group == 'C') or
-                    (dot.group == 'B' and other.group == 'A') or
-                    (dot.group == 'C' and other.group == 'B')
-                )
-                
-                # Prioritize closer prey
-                if is_prey and distance < CHASE_THRESHOLD:
-                    weight = PREY_WEIGHT * (1 - distance/CHASE_THRESHOLD)  # Stronger attraction to closer prey
-                    if distance < min_prey_dist:
-                        min_prey_dist = distance
-                        closest_prey = other
-                
-                # Be less afraid of predators
-                elif is_predator and distance < FLEE_THRESHOLD:
-                    weight = PREDATOR_WEIGHT * (1 - distance/FLEE_THRESHOLD)  # Weaker repulsion from predators
-                    if distance < min_predator_dist:
-                        min_predator_dist = distance
-                        closest_predator = other
-
-            # Adjust target selection
-            if closest_prey and (not closest_predator or min_prey_dist < min_predator_dist * 1.5):
-                # More likely to chase prey even when predator is nearby
-                dot.target = closest_prey
-                dot.fleeing = False
-            elif closest_predator:
-                dot.target = closest_predator
-                dot.fleeing = True
-            else:
-                dot.target = None
-                dot.fleeing = False
-                
-                # Random movement when no targets
-                if random.random() < 0.02:  # 2% chance each frame
-                    angle = random.uniform(0, 2 * math.pi)
-                    dot.momentum_x = math.cos(angle) * GLOBAL_MAX_SPEED * 0.5
-                    dot.momentum_y = math.sin(angle) * GLOBAL_MAX_SPEED * 0.5
-
-    def move_towards_target(self, dot):
-        if dot.target:
-            dx = dot.target.x - dot.x
-            dy = dot.target.y - dot.y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance > 0:
-                # Normalize direction
-                dx /= distance
-                dy /= distance
-                
-                # Apply force based on whether fleeing or chasing
-                if dot.fleeing:
-                    force = GLOBAL_MIN_SPEED + (GLOBAL_MAX_SPEED - GLOBAL_MIN_SPEED) * 0.7  # Slower when fleeing
-                    dx = -dx  # Reverse direction
-                    dy = -dy
-                else:
-                    force = GLOBAL_MIN_SPEED + (GLOBAL_MAX_SPEED - GLOBAL_MIN_SPEED)  # Full speed when chasing
-                
-                # Add some randomness to movement
-                dx += random.uniform(-0.2, 0.2)
-                dy += random.uniform(-0.2, 0.2)
-                
-                # Update momentum with more aggressive acceleration
-                dot.momentum_x = dot.momentum_x * 0.95 + dx * force * 0.2
-                dot.momentum_y = dot.momentum_y * 0.95 + dy * force * 0.2
-        
-        # Apply momentum
-        dot.x += dot.momentum_x
-        dot.y += dot.momentum_y
-
-    def handle_collisions(self):
-        i = 0
-        collision_occurred = False
-        while i < len(self.dots):
-            dot1 = self.dots[i]
-            j = i + 1
-            while j < len(self.dots):
-                dot2 = self.dots[j]
-                if dot1.distance_to(dot2) < EATING_DISTANCE:
-                    if dot1.can_eat(dot2):
-                        dot2.group = dot1.group
-                        collision_occurred = True
-                    elif dot2.can_eat(dot1):
-                        dot1.group = dot2.group
-                        collision_occurred = True
-                j += 1
-            i += 1
-        return collision_occurred
-
-    def check_winner(self):
-        groups = {'A': 0, 'B': 0, 'C': 0}
-        for dot in self.dots:
-            groups[dot.group] += 1
-        
-        for group, count in groups.items():
-            if count == len(self.dots):
-                if not self.winner:
-                    self.winner = group
-                    self.winner_time = pygame.time.get_ticks()
-                return True
-        return False
-
-    def display_winner(self, group):
+    def reset_game(self):
+        super().reset_game()
+        # Nothing to interpolate from until the first tick
+        self.previous_x = self.dots.x.copy()
+        self.previous_y = self.dots.y.copy()
+
+    def resume(self, path):
+        """Carry on the match saved in a checkpoint file instead of the current one."""
+        checkpoint.load(path, self)
+        self.previous_x = self.dots.x.copy()
+        self.previous_y = self.dots.y.copy()
+
+    def display_winner(self, frame, group):
         def draw_large_shape(shape_type, color, center_pos, size):
             surface = pygame.Surface((size, size), pygame.SRCALPHA)
             
@@ -578,33 +244,32 @@ class Game:
             shape_surface = draw_large_shape(group, color, 
                                           (WINDOW_WIDTH//2, WINDOW_HEIGHT//2 - 40), 80)
             shape_rect = shape_surface.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 - 40))
-            self.screen.blit(shape_surface, shape_rect)
+            rects = [self.screen.blit(shape_surface, shape_rect)]
             
             # Draw "WINS!" text below the shape
             wins_text = "WINS!"
             wins_surface = FONT_LARGE.render(wins_text, True, YELLOW)
             wins_rect = wins_surface.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 + 40))
-            self.screen.blit(wins_surface, wins_rect)
+            rects.append(self.screen.blit(wins_surface, wins_rect))
         else:
             # For "No one wins" case
             text_surface = FONT_LARGE.render("DRAW!", True, YELLOW)
             text_rect = text_surface.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 - 40))
-            self.screen.blit(text_surface, text_rect)
+            rects = [self.screen.blit(text_surface, text_rect)]
         
         # Create countdown text with softer color
-        time_left = (RESTART_DELAY - (pygame.time.get_ticks() - self.winner_time)) // 1000
+        time_left = (RESTART_DELAY - (frame.ticks - frame.winner_tick)) // TICK_RATE
         if time_left < 0:
             time_left = 0
         countdown_text = f"Restarting in {time_left}..."
         countdown_surface = FONT_MEDIUM.render(countdown_text, True, SOFT_WHITE)
         countdown_rect = countdown_surface.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 + 100))
-        self.screen.blit(countdown_surface, countdown_rect)
+        rects.append(self.screen.blit(countdown_surface, countdown_rect))
+        return rects[0].unionall(rects[1:])
 
-    def draw_status_table(self):
+    def draw_status_table(self, frame):
         # Count current populations
-        populations = {'A': 0, 'B': 0, 'C': 0}
-        for dot in self.dots:
-            populations[dot.group] += 1
+        populations = dict(zip(GROUPS, frame.populations.tolist()))
 
         prey_groups = {
             'A': 'B',
@@ -658,126 +323,471 @@ class Game:
             text = self.font.render(str(populations[group]), True, BLACK)
             self.screen.blit(text, (table_x + 210, y))
 
-    def is_inside_circle(self, x, y):
-        distance_to_center = math.sqrt((x - self.circle_center[0])**2 + (y - self.circle_center[1])**2)
-        return distance_to_center <= self.circle_radius
+        return pygame.Rect(table_x, table_y, table_width, table_height)
+
+    def draw_profiler(self):
+        """Draw the frame profiler panel: a stacked bar per recent frame and per-phase means."""
+        panel_width = PROFILER_GRAPH_WIDTH + 20
+        panel_height = PROFILER_GRAPH_HEIGHT + 115
+        panel_x = WINDOW_WIDTH - panel_width - 10
+        panel_y = 10
+        panel = pygame.Rect(panel_x, panel_y, panel_width, panel_height)
+        pygame.draw.rect(self.screen, WHITE, panel)
+        pygame.draw.rect(self.screen, BLACK, panel, 2)
+
+        times, totals = self.profiler.recent()
+        mean_total = totals.mean() * 1000 if len(totals) else 0.0
+        title = f"Frame {mean_total:.1f} ms avg, {self.profiler.dropped} dropped of {self.profiler.frames}"
+        self.screen.blit(FONT_SMALL.render(title, True, BLACK), (panel_x + 10, panel_y + 8))
+
+        # Color each pixel of a column by the phase whose slice of the frame it falls in
+        scale = PROFILER_GRAPH_HEIGHT / (2 * self.profiler.budget)
+        tops = np.cumsum(times, axis=1) * scale
+        heights = np.arange(PROFILER_GRAPH_HEIGHT) + 0.5
+        phases = (heights[None, :, None] >= tops[:, None, :]).sum(axis=2)
+        palette = np.array(PROFILER_COLORS + [SOFT_WHITE])
+        pixels = np.empty((PROFILER_GRAPH_WIDTH, PROFILER_GRAPH_HEIGHT, 3), dtype=np.uint8)
+        pixels[:] = SOFT_WHITE
+        pixels[PROFILER_GRAPH_WIDTH - len(times):] = palette[phases][:, ::-1]
+        # Mark the frame budget, halfway up
+        pixels[:, PROFILER_GRAPH_HEIGHT // 2] = BLACK
+        pygame.surfarray.blit_array(self.profiler_graph, pixels)
+        self.screen.blit(self.profiler_graph, (panel_x + 10, panel_y + 25))
+
+        # Legend: two columns of phases with their mean time
+        means = self.profiler.means()
+        legend_y = panel_y + PROFILER_GRAPH_HEIGHT + 35
+        for i, (name, color) in enumerate(zip(PROFILER_PHASES, PROFILER_COLORS)):
+            x = panel_x + 10 + (i // 5) * (panel_width // 2)
+            y = legend_y + (i % 5) * 15
+            pygame.draw.rect(self.screen, color, (x, y + 2, 10, 10))
+            text = FONT_SMALL.render(f"{name} {means[name] * 1000:.2f} ms", True, BLACK)
+            self.screen.blit(text, (x + 15, y))
+
+        return panel
 
-    def force_towards_circle(self, dot):
-        if not self.is_inside_circle(dot.x, dot.y):
-            dx = self.circle_center[0] - dot.x
-            dy = self.circle_center[1] - dot.y
-            distance = math.sqrt(dx**2 + dy**2)
-            if distance > 0:
-                dot.x += (dx/distance) * OUTSIDE_CIRCLE_FORCE
-                dot.y += (dy/distance) * OUTSIDE_CIRCLE_FORCE
+    def update_targets(self):
+        with self.profiler.phase('targets'):
+            super().update_targets()
 
-    def run(self):
-        running = True
-        initial_radius = self.circle_radius
-        last_collision_time = pygame.time.get_ticks()
+    def move_towards_target(self):
+        with self.profiler.phase('movement'):
+            super().move_towards_target()
 
-        while running:
-            current_time = pygame.time.get_ticks()
+    def move_strategically(self):
+        with self.profiler.phase('movement'):
+            super().move_strategically()
+
+    def force_towards_circle(self):
+        with self.profiler.phase('movement'):
+            super().force_towards_circle()
+
+    def handle_collisions(self):
+        with self.profiler.phase('collisions'):
+            return super().handle_collisions()
 
+    def update_bonuses(self):
+        with self.profiler.phase('bonus'):
+            super().update_bonuses()
+
+    def handle_bonus_collisions(self):
+        with self.profiler.phase('bonus'):
+            super().handle_bonus_collisions()
+
+    def build_background(self):
+        """Render the gradient background once; it never changes."""
+        background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        for y in range(WINDOW_HEIGHT):
+            progress = y / WINDOW_HEIGHT
+            color = [
+                int(DEEP_BLUE[0] * (1 - progress) + BLACK[0] * progress),
+                int(DEEP_BLUE[1] * (1 - progress) + BLACK[1] * progress),
+                int(DEEP_BLUE[2] * (1 - progress) + BLACK[2] * progress)
+            ]
+            pygame.draw.line(background, color, (0, y), (WINDOW_WIDTH, y))
+        return background
+
+    def update_arena(self, frame):
+        """Redraw the background plus play zone circle when the radius crosses a pixel.
+
+        Returns True if the arena layer changed.
+        """
+        radius = int(frame.circle_radius) if frame.circle_radius > 0 else 0
+        if radius == self.arena_radius:
+            return False
+        self.arena_radius = radius
+
+        self.arena.blit(self.background, (0, 0))
+        if frame.circle_radius > 0:
+            center = (int(frame.circle_center[0]), int(frame.circle_center[1]))
+            # Draw outer glow
+            for i in range(3):
+                glow_radius = frame.circle_radius + (3 - i)
+                glow_color = (
+                    CIRCLE_COLOR[0] // (i + 2),
+                    CIRCLE_COLOR[1] // (i + 2),
+                    CIRCLE_COLOR[2] // (i + 2)
+                )
+                pygame.draw.circle(self.arena, glow_color, center, int(glow_radius), 1)
+            # Draw main circle
+            pygame.draw.circle(self.arena, CIRCLE_COLOR, center, radius, 2)
+        return True
+
+    def draw(self, alpha=1.0, frame=None):
+        """Draw one frame, sending only the changed parts of the screen to the display.
+
+        Drawing reads a Snapshot of the match, by default one taken of the
+        match as it is now. Dots are drawn `alpha` of the way from where they
+        were before the last tick to where they are now. Sprites from the
+        previous frame are erased by copying the arena layer back over their
+        rects; the whole screen is only redrawn when the arena changes or too
+        many rects are dirty.
+        """
+        if frame is None:
+            frame = self.frame
+            frame.capture(self)
+        with self.profiler.phase('arena'):
+            full_redraw = self.update_arena(frame) or len(self.dirty_rects) > MAX_DIRTY_RECTS
+        with self.profiler.phase('background'):
+            if full_redraw:
+                self.screen.blit(self.arena, (0, 0))
+            else:
+                for rect in self.dirty_rects:
+                    self.screen.blit(self.arena, rect, rect)
+
+        drawn = []
+        with self.profiler.phase('sprites'):
+            self.draw_sprites(frame, drawn, alpha)
+        with self.profiler.phase('hud'):
+            self.draw_hud(frame, drawn)
+
+        with self.profiler.phase('present'):
+            if full_redraw or len(drawn) > MAX_DIRTY_RECTS:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.dirty_rects + drawn)
+        self.dirty_rects = drawn
+
+    def draw_sprites(self, frame, drawn, alpha=1.0):
+        """Draw bonus disks and dots, appending the rect of each to drawn.
+
+        Every sprite of the frame is handed to pygame in one Surface.blits
+        call, built from the position arrays, so the per-sprite Python work
+        is little more than making a (surface, position) pair.
+        """
+        # Bonus disks with subtle glow
+        bonus_lefts = (frame.bonus_x.astype(int) - Game.bonus_offset).tolist()
+        bonus_tops = (frame.bonus_y.astype(int) - Game.bonus_offset).tolist()
+        sprites = [Game.bonus_img] * len(bonus_lefts)
+        positions = list(zip(bonus_lefts, bonus_tops))
+
+        if len(frame.x) > self.lod_threshold:
+            drawn += self.screen.blits(zip(sprites, positions))
+            drawn.append(self.draw_density(frame, alpha))
+            return
+
+        # Dots, on top of the disks
+        steps = np.round(frame.angle * (SPRITE_ROTATIONS / 360)).astype(int) % SPRITE_ROTATIONS
+        offsets = Game.sprite_offsets[frame.group, steps]
+        xs, ys = frame.positions(alpha)
+        lefts = xs.astype(int) - offsets[:, 0]
+        tops = ys.astype(int) - offsets[:, 1]
+        sprites += Game.sprite_table[frame.group.astype(np.intp) * SPRITE_ROTATIONS + steps].tolist()
+        positions += zip(lefts.tolist(), tops.tolist())
+
+        drawn += self.screen.blits(zip(sprites, positions))
+
+    def draw_density(self, frame, alpha=1.0):
+        """Draw the dots as a map of how many of each group are in every small cell.
+
+        Each cell takes the mix of its groups' colors and is more opaque the
+        more dots it holds, so the cost depends on the window size, not on
+        the number of dots. Returns the rect drawn over.
+        """
+        cols, rows = self.density.get_size()
+        xs, ys = frame.positions(alpha)
+        cx = np.clip(xs // LOD_CELL_SIZE, 0, cols - 1).astype(np.intp)
+        cy = np.clip(ys // LOD_CELL_SIZE, 0, rows - 1).astype(np.intp)
+        cells = (frame.group.astype(np.intp) * cols + cx) * rows + cy
+        counts = np.bincount(cells, minlength=len(GROUPS) * cols * rows).reshape(len(GROUPS), cols, rows)
+        totals = counts.sum(axis=0)
+
+        colors = np.array([RED, GREEN, BLUE], dtype=float)
+        mix = np.tensordot(colors.T, counts, axes=1) / np.maximum(totals, 1)
+        pygame.surfarray.pixels3d(self.density)[:] = np.moveaxis(mix, 0, -1)
+        # A lone dot is still visible; crowds fade in to fully opaque
+        opacity = np.where(totals > 0, 128 + 127 * np.minimum(totals / LOD_SATURATION, 1), 0)
+        pygame.surfarray.pixels_alpha(self.density)[:] = opacity
+
+        pygame.transform.scale(self.density, (WINDOW_WIDTH, WINDOW_HEIGHT), self.density_scaled)
+        return self.screen.blit(self.density_scaled, (0, 0))
+
+    def draw_hud(self, frame, drawn):
+        """Draw the status table, winner banner and profiler, appending their rects to drawn."""
+        # Draw status table
+        drawn.append(self.draw_status_table(frame))
+
+        # Check for winner
+        if frame.winner:
+            if len(frame.x) > 0:
+                drawn.append(self.display_winner(frame, frame.winner))
+            else:
+                drawn.append(self.display_winner(frame, "No one"))
+
+        if self.show_profiler:
+            drawn.append(self.draw_profiler())
+
+    def tick(self):
+        """Play one simulation tick, remembering where the dots started it."""
+        # Check for game restart
+        if self.winner and self.ticks - self.winner_tick >= RESTART_DELAY:
+            self.reset_game()
+
+        self.previous_x = self.dots.x.copy()
+        self.previous_y = self.dots.y.copy()
+        self.step()
+        if self.recorder:
+            self.recorder.record(self)
+        if self.telemetry:
+            self.telemetry.write(sample(self))
+
+    def handle_events(self):
+        """Handle the events of one frame, returning whether to keep running and the other keys pressed."""
+        running = True
+        keys = []
+        with self.profiler.phase('events'):
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_profiler = not self.show_profiler
+                elif event.type == pygame.KEYDOWN:
+                    keys.append(event.key)
+        return running, keys
+
+    def ticks_due(self, backlog):
+        """Return how many ticks are due after backlog seconds, and the seconds left over.
+
+        At most MAX_CATCH_UP_TICKS are played at once: when further behind
+        than that, the rest of the backlog is dropped rather than letting
+        the match fall further behind.
+        """
+        tick_duration = 1 / self.tick_rate
+        ticks, left = divmod(backlog, tick_duration)
+        return min(int(ticks), MAX_CATCH_UP_TICKS), left
+
+    def finish_frame(self, frame_rate):
+        """Capture the drawn frame, if capturing, and wait for the next one."""
+        if self.capture:
+            self.capture.capture(self.screen)
+        self.profiler.end_frame()
+        self.clock.tick(frame_rate)
 
-            # Check for game restart
-            if self.winner and current_time - self.winner_time >= RESTART_DELAY:
-                self.reset_game()
-
-            self.circle_radius -= CIRCLE_SHRINK_SPEED
-            if self.circle_radius < 0:
-                self.circle_radius = 0
-
-            current_ratio = self.circle_radius / initial_radius
-
-            # Check for bonus disk spawning at different thresholds
-            for threshold in [0.8, 0.7, 0.6, 0.4]:
-                if not self.bonus_spawned[threshold] and current_ratio <= threshold:
-                    self.spawn_bonus_disks(10 if threshold == 0.7 else 8)
-                    self.bonus_spawned[threshold] = True
-
-            if not self.winner:
-                self.update_targets()
-                for dot in self.dots:
-                    dot.update_bonus()
-                    self.move_towards_target(dot)
-                    self.force_towards_circle(dot)
-
-                if self.handle_collisions():
-                    last_collision_time = current_time
-                self.handle_bonus_collisions()
-
-            # Drawing
-            # Create a gradient background
-            for y in range(WINDOW_HEIGHT):
-                progress = y / WINDOW_HEIGHT
-                color = [
-                    int(DEEP_BLUE[0] * (1 - progress) + BLACK[0] * progress),
-                    int(DEEP_BLUE[1] * (1 - progress) + BLACK[1] * progress),
-                    int(DEEP_BLUE[2] * (1 - progress) + BLACK[2] * progress)
-                ]
-                pygame.draw.line(self.screen, color, (0, y), (WINDOW_WIDTH, y))
-            
-            # Draw play zone circle with a glowing effect
-            if self.circle_radius > 0:
-                # Draw outer glow
-                for i in range(3):
-                    glow_radius = self.circle_radius + (3 - i)
-                    glow_color = (
-                        CIRCLE_COLOR[0] // (i + 2),
-                        CIRCLE_COLOR[1] // (i + 2),
-                        CIRCLE_COLOR[2] // (i + 2)
-                    )
-                    pygame.draw.circle(self.screen, glow_color,
-                                    (int(self.circle_center[0]), int(self.circle_center[1])),
-                                    int(glow_radius), 1)
-                # Draw main circle
-                pygame.draw.circle(self.screen, CIRCLE_COLOR,
-                                (int(self.circle_center[0]), int(self.circle_center[1])),
-                                int(self.circle_radius), 2)
-
-            # Draw bonus disks with subtle glow
-            for bonus in self.bonus_disks:
-                # Draw glow
-                pygame.draw.circle(self.screen, (PURPLE[0]//2, PURPLE[1]//2, PURPLE[2]//2),
-                                (int(bonus.x), int(bonus.y)),
-                                int(bonus.radius + 2))
-                # Draw main disk
-                pygame.draw.circle(self.screen, PURPLE,
-                                (int(bonus.x), int(bonus.y)),
-                                int(bonus.radius))
-            
-            # Draw dots
-            for dot in self.dots:
-                if dot.momentum_x != 0 or dot.momentum_y != 0:
-                    angle = math.degrees(math.atan2(-dot.momentum_y, dot.momentum_x))
-                    dot.last_angle = angle
-                else:
-                    angle = dot.last_angle
-
-                img = dot.get_image()
-                rotated_img = pygame.transform.rotate(img, angle)
-                img_rect = rotated_img.get_rect(center=(int(dot.x), int(dot.y)))
-                self.screen.blit(rotated_img, img_rect)
-
-            # Draw status table
-            self.draw_status_table()
-
-            # Check for winner
-            if self.check_winner() or len(self.dots) == 0:
-                if len(self.dots) > 0:
-                    self.display_winner(self.winner)
-                else:
-                    self.display_winner("No one")
-
-            pygame.display.flip()
-            self.clock.tick(60)
-
-        pygame.quit()
+    def run(self):
+        """Play matches in real time until the window is closed.
+
+        Ticks are due every 1/tick_rate seconds of real time. Each frame
+        plays the ticks that have come due since the last one, at most
+        MAX_CATCH_UP_TICKS, then draws the dots part way to the next tick,
+        so how fast frames are drawn never changes what happens in a match.
+        """
+        running = True
+        tick_duration = 1 / self.tick_rate
+        accumulator = 0.0
+        last_time = time.perf_counter()
+
+        try:
+            while running:
+                self.profiler.start_frame()
+                running, _ = self.handle_events()
+
+                now = time.perf_counter()
+                ticks, accumulator = self.ticks_due(accumulator + now - last_time)
+                last_time = now
+                for _ in range(ticks):
+                    self.tick()
+
+                self.draw(accumulator / tick_duration)
+                self.finish_frame(self.frame_rate)
+
+            if self.checkpoint_path:
+                checkpoint.save(self, self.checkpoint_path)
+        finally:
+            self.close()
+
+    def simulate(self, exchange, stop):
+        """Play ticks in real time until stop is set, publishing a snapshot after each batch.
+
+        This is the worker side of run_threaded(): it is the only thread that
+        touches the match, and each snapshot is stamped with the time its
+        last tick was due so the renderer knows how far to interpolate. An
+        error is kept in self.simulation_error for run_threaded() to raise.
+        """
+        tick_duration = 1 / self.tick_rate
+        accumulator = 0.0
+        last_time = time.perf_counter()
+        try:
+            while not stop.is_set():
+                now = time.perf_counter()
+                ticks, accumulator = self.ticks_due(accumulator + now - last_time)
+                last_time = now
+                if ticks == 0:
+                    stop.wait(tick_duration - accumulator)
+                    continue
+                for _ in range(ticks):
+                    self.tick()
+                exchange.back.capture(self, now - accumulator)
+                exchange.publish()
+        except Exception as error:
+            self.simulation_error = error
+
+    def run_threaded(self):
+        """Like run(), but with the match played on a worker thread while frames are drawn.
+
+        The main thread only handles events and draws the newest snapshot the
+        worker has published, so on a machine with spare cores a frame takes
+        as long as the slower of ticking and drawing rather than both. The
+        NumPy work of a tick and pygame's blitting and presenting mostly run
+        without holding the GIL, which is what lets the two overlap.
+
+        An error on the worker is raised here once it has stopped, and the
+        match, left part way through a tick, is not checkpointed.
+        """
+        exchange = SnapshotExchange()
+        exchange.front.capture(self, time.perf_counter())
+        stop = threading.Event()
+        self.simulation_error = None
+        worker = threading.Thread(target=self.simulate, args=(exchange, stop), name='simulation', daemon=True)
+        worker.start()
+
+        running = True
+        tick_duration = 1 / self.tick_rate
+        try:
+            try:
+                while running and worker.is_alive():
+                    self.profiler.start_frame()
+                    running, _ = self.handle_events()
+
+                    frame = exchange.acquire()
+                    alpha = min(max((time.perf_counter() - frame.time) / tick_duration, 0.0), 1.0)
+                    self.draw(alpha, frame)
+                    self.finish_frame(self.frame_rate)
+            finally:
+                stop.set()
+                worker.join()
+
+            if self.simulation_error is not None:
+                raise self.simulation_error
+            if self.checkpoint_path:
+                checkpoint.save(self, self.checkpoint_path)
+        finally:
+            self.close()
+
+    def close(self):
+        """Finish the recording, telemetry, capture and profile files and shut pygame down.
+
+        Closing the capture re-raises any error its encoders hit, after
+        the profile is written and pygame is shut down all the same.
+        """
+        try:
+            if self.recorder:
+                self.recorder.close()
+            if self.telemetry:
+                self.telemetry.close()
+            if self.capture:
+                self.capture.close()
+        finally:
+            self.profiler.close()
+            pygame.quit()
+
+    def show_frame(self, frame):
+        """Put the state of a recorded frame in self.frame, for drawing."""
+        self.frame.load_replay(frame, self.circle_center)
+
+    def play_replay(self, path):
+        """Play a recorded match instead of simulating one.
+
+        Space pauses, the left and right arrows seek, Home jumps to the start.
+        """
+        reader = ReplayReader(path)
+        number = 0
+        frames = reader.frames(number)
+        frame = next(frames, None)
+        paused = False
+        running = frame is not None
+
+        while running:
+            self.profiler.start_frame()
+            seek = None
+            running, keys = self.handle_events()
+            for key in keys:
+                if key == pygame.K_SPACE:
+                    paused = not paused
+                elif key == pygame.K_LEFT:
+                    seek = number - REPLAY_SEEK_FRAMES
+                elif key == pygame.K_RIGHT:
+                    seek = number + REPLAY_SEEK_FRAMES
+                elif key == pygame.K_HOME:
+                    seek = 0
+
+            if seek is not None:
+                number = min(max(seek, 0), len(reader) - 1)
+                frames = reader.frames(number)
+                frame = next(frames)
+            elif not paused and number < len(reader) - 1:
+                number += 1
+                frame = next(frames)
+
+            self.show_frame(frame)
+            self.draw(frame=self.frame)
+            self.finish_frame(TICK_RATE)
+
+        reader.close()
+        self.close()
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Scissors-Paper-Rock Battlefield")
+    parser.add_argument('--seed', type=int, default=None, help="seed for a reproducible sequence of matches")
+    parser.add_argument('--profile', action='store_true', help="show the frame profiler (toggle with F3)")
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help="write per-phase frame times to FILE, as CSV if it ends in .csv, else JSON lines")
+    parser.add_argument('--record', metavar='FILE', help="record every match played to a replay file")
+    parser.add_argument('--replay', metavar='FILE', help="play back a replay file instead of simulating")
+    parser.add_argument('--telemetry', metavar='DIR', help="save per-tick populations and events to DIR")
+    parser.add_argument('--tick-rate', type=float, default=TICK_RATE,
+                        help=f"simulation ticks per second; {TICK_RATE} plays matches in real time")
+    parser.add_argument('--fps', type=int, default=FRAME_RATE, help="frames drawn per second")
+    parser.add_argument('--strategic', action='store_true',
+                        help="let dots hold back and circle when populations get out of balance")
+    parser.add_argument('--lod-threshold', type=int, default=LOD_THRESHOLD,
+                        help="draw a density map instead of sprites when there are more dots than this")
+    parser.add_argument('--capture', metavar='PATH',
+                        help="save drawn frames as PNG files in directory PATH, or as an animated GIF if it ends in .gif")
+    parser.add_argument('--capture-every', type=positive_int, default=1, metavar='N', help="save every Nth frame")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule, e.g. --set flee_threshold=200")
+    parser.add_argument('--checkpoint', metavar='FILE', help="save the match to FILE when the window is closed")
+    parser.add_argument('--resume', metavar='FILE', help="carry on a match saved with --checkpoint or checkpoint.py")
+    parser.add_argument('--threaded', action='store_true',
+                        help="simulate on a worker thread while drawing, for machines with several cores")
+    args = parser.parse_args()
+    # A resumed match carries on with the random state, rules and movement it was saved with
+    if args.resume:
+        for option, given in (('--seed', args.seed is not None), ('--set', args.set), ('--strategic', args.strategic)):
+            if given:
+                parser.error(f"{option} cannot be used with --resume: the match keeps the settings it was saved with")
+
+    # A resumed match keeps the rules it was saved with
+    config = checkpoint.read_config(args.resume) if args.resume else Config(**dict(args.set))
+    game = Game(seed=args.seed, show_profiler=args.profile, profile_output=args.profile_output,
+                record=args.record, telemetry=args.telemetry, tick_rate=args.tick_rate, frame_rate=args.fps,
+                strategic=args.strategic, lod_threshold=args.lod_threshold, capture=args.capture,
+                capture_every=args.capture_every, checkpoint_path=args.checkpoint, config=config)
+    if args.resume:
+        game.resume(args.resume)
+    if args.replay:
+        game.play_replay(args.replay)
+    elif args.threaded:
+        game.run_threaded()
+    else:
+        game.run()
@@ -0,0 +1,97 @@
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+class FrameProfiler:
+    """Time spent in each phase of recent frames.
+
+    Wrap work in `with profiler.phase(name):` between start_frame() and
+    end_frame(); time in the same phase adds up within a frame. Only phases
+    run on the thread that started the frame count towards it. The last
+    `history` frames are kept for display, and every frame can also be
+    written to a CSV or JSON lines file as it ends.
+    """
+
+    def __init__(self, phases, history=240, budget=1 / 60):
+        self.phases = list(phases)
+        self.columns = {name: i for i, name in enumerate(self.phases)}
+        self.history = history
+        self.budget = budget  # Seconds a frame may take before it counts as dropped
+        self.times = np.zeros((history, len(self.phases)))
+        self.totals = np.zeros(history)
+        self.current = np.zeros(len(self.phases))
+        self.frames = 0
+        self.dropped = 0
+        self.frame_start = None
+        self.thread = None
+        self.export_file = None
+        self.writer = None
+
+    @contextmanager
+    def phase(self, name):
+        if threading.get_ident() != self.thread:
+            # Work on another thread, e.g. a simulation worker, overlaps the frame rather than adding to it
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[self.columns[name]] += time.perf_counter() - start
+
+    def start_frame(self):
+        self.current[:] = 0
+        self.frame_start = time.perf_counter()
+        self.thread = threading.get_ident()
+
+    def end_frame(self):
+        total = time.perf_counter() - self.frame_start
+        slot = self.frames % self.history
+        self.times[slot] = self.current
+        self.totals[slot] = total
+        dropped = total > self.budget
+        if dropped:
+            self.dropped += 1
+        if self.writer:
+            self.write_row(total, dropped)
+        self.frames += 1
+
+    def recent(self):
+        """Return (phase times, frame totals) of the kept frames, oldest first, in seconds."""
+        count = min(self.frames, self.history)
+        order = (np.arange(self.frames - count, self.frames)) % self.history
+        return self.times[order], self.totals[order]
+
+    def means(self):
+        """Return {phase: mean seconds} over the kept frames."""
+        times, _ = self.recent()
+        means = times.mean(axis=0) if len(times) else np.zeros(len(self.phases))
+        return dict(zip(self.phases, means.tolist()))
+
+    def open_export(self, path):
+        """Write every following frame to `path`: CSV if it ends in .csv, else JSON lines."""
+        self.close()
+        self.export_file = open(path, 'w', newline='')
+        if path.endswith('.csv'):
+            fields = ['frame', 'total_ms', 'dropped'] + [f"{name}_ms" for name in self.phases]
+            csv_writer = csv.DictWriter(self.export_file, fieldnames=fields)
+            csv_writer.writeheader()
+            self.writer = csv_writer.writerow
+        else:
+            self.writer = lambda row: self.export_file.write(json.dumps(row) + '\n')
+
+    def write_row(self, total, dropped):
+        row = {'frame': self.frames, 'total_ms': round(total * 1000, 3), 'dropped': int(dropped)}
+        for name, seconds in zip(self.phases, self.current.tolist()):
+            row[f"{name}_ms"] = round(seconds * 1000, 3)
+        self.writer(row)
+
+    def close(self):
+        if self.export_file:
+            self.export_file.close()
+        self.export_file = None
+        self.writer = None
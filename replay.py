@@ -0,0 +1,264 @@
+import argparse
+import mmap
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from simulation import GROUPS, Config, Simulation, parse_setting
+
+# File layout:
+#   header   MAGIC, version, position scale, keyframe interval
+#   frames   one per recorded tick: u32 length + zlib-compressed payload
+#   index    (frame number, file offset) of every keyframe, as int64 pairs
+#   footer   index offset, keyframe count, frame count, INDEX_MAGIC
+# A frame payload is FRAME_HEADER followed by the dot x and y positions
+# (int16, in 1/POSITION_SCALE pixels), groups (int8) and sprite angles
+# (uint8, in 1/ANGLE_STEPS turns), then the bonus disk positions (float32)
+# if they changed. Keyframes hold absolute values; other frames hold the
+# wrapping difference from the previous frame, which is mostly zeros and
+# compresses well. The positions are stored low bytes first, then high
+# bytes, so the nearly constant high bytes of small differences form long
+# runs for zlib. Dots are never removed within a match, so a frame only
+# ever adds dots at the end; a new match always starts with a keyframe.
+MAGIC = b'SPRREPLY'
+INDEX_MAGIC = b'SPRINDEX'
+VERSION = 1
+HEADER = struct.Struct('<8sHHI')
+FRAME_HEADER = struct.Struct('<BIIfBII')  # flags, tick, winner tick, circle radius, winner, dots, bonus disks
+FOOTER = struct.Struct('<QII8s')
+LENGTH = struct.Struct('<I')
+
+KEYFRAME = 1
+BONUS_CHANGED = 2
+
+POSITION_SCALE = 16     # Positions are stored to 1/16 pixel
+ANGLE_STEPS = 256       # Sprite angles are stored to 1/256 turn
+KEYFRAME_INTERVAL = 300  # Frames between keyframes, i.e. 5 seconds of match time
+
+class ReplayFrame:
+    """The drawable state of a match at one recorded tick."""
+
+    __slots__ = ('tick', 'winner', 'winner_tick', 'circle_radius',
+                 'x', 'y', 'group', 'angle', 'bonus_x', 'bonus_y')
+
+    def __init__(self, tick, winner, winner_tick, circle_radius, x, y, group, angle, bonus_x, bonus_y):
+        self.tick = tick
+        self.winner = winner
+        self.winner_tick = winner_tick
+        self.circle_radius = circle_radius
+        self.x = x
+        self.y = y
+        self.group = group
+        self.angle = angle
+        self.bonus_x = bonus_x
+        self.bonus_y = bonus_y
+
+class ReplayWriter:
+    """Append one frame per tick of a Simulation (or Game) to a replay file."""
+
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL):
+        self.file = open(path, 'wb')
+        self.keyframe_interval = keyframe_interval
+        self.file.write(HEADER.pack(MAGIC, VERSION, POSITION_SCALE, keyframe_interval))
+        self.keyframes = []
+        self.frames = 0
+        self.previous = None
+        self.previous_bonus = None
+        self.heading = np.zeros(0)
+        self.last_tick = None
+
+    def record(self, sim):
+        dots = sim.dots
+        count = len(dots)
+
+        # Sprites face the way a dot last moved, as in Game.draw
+        heading = np.zeros(count)
+        kept = min(count, len(self.heading))
+        heading[:kept] = self.heading[:kept]
+        moving = (dots.momentum_x != 0) | (dots.momentum_y != 0)
+        heading[moving] = np.degrees(np.arctan2(-dots.momentum_y[moving], dots.momentum_x[moving]))
+        self.heading = heading
+
+        current = [
+            # Rounded down, so a replayed dot lands on the same whole pixel as the live one
+            np.clip(np.floor(dots.x * POSITION_SCALE), -32768, 32767).astype(np.int16),
+            np.clip(np.floor(dots.y * POSITION_SCALE), -32768, 32767).astype(np.int16),
+            dots.group.astype(np.int8),
+            (np.round(heading * (ANGLE_STEPS / 360)) % ANGLE_STEPS).astype(np.uint8),
+        ]
+        bonus_x, bonus_y = sim.bonus_disks.positions()
+        bonus = np.stack([bonus_x, bonus_y]).astype(np.float32)
+
+        new_match = (self.previous is None or count < len(self.previous[0]) or
+                     self.last_tick is None or sim.ticks <= self.last_tick)
+        keyframe = new_match or self.frames % self.keyframe_interval == 0
+        flags = KEYFRAME if keyframe else 0
+        if keyframe or not np.array_equal(bonus, self.previous_bonus):
+            flags |= BONUS_CHANGED
+
+        if keyframe:
+            columns = current
+        else:
+            # Dots added since the last frame are diffed against zero
+            columns = []
+            for values, previous in zip(current, self.previous):
+                padded = np.zeros_like(values)
+                padded[:len(previous)] = previous
+                columns.append(values - padded)
+
+        winner = GROUPS.index(sim.winner) + 1 if sim.winner else 0
+        parts = [FRAME_HEADER.pack(flags, sim.ticks, sim.winner_tick, sim.circle_radius,
+                                   winner, count, bonus.shape[1])]
+        parts.extend(column.view(np.uint8).reshape(-1, column.itemsize).T.tobytes() for column in columns)
+        if flags & BONUS_CHANGED:
+            parts.append(bonus.tobytes())
+        payload = zlib.compress(b''.join(parts))
+
+        if keyframe:
+            self.keyframes.append((self.frames, self.file.tell()))
+        self.file.write(LENGTH.pack(len(payload)))
+        self.file.write(payload)
+
+        self.previous = current
+        self.previous_bonus = bonus
+        self.last_tick = sim.ticks
+        self.frames += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.keyframes, dtype=np.int64).reshape(-1, 2).tobytes())
+        self.file.write(FOOTER.pack(index_offset, len(self.keyframes), self.frames, INDEX_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ReplayReader:
+    """Read a replay file through a memory map, frame by frame or from any frame.
+
+    Seeking decodes forward from the nearest keyframe at or before the
+    wanted frame. Files whose index was never written, e.g. because the
+    recording was interrupted, are indexed by scanning the frames.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.position_scale, self.keyframe_interval = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+
+        size = len(self.data)
+        index_offset, keyframes, frames, index_magic = (None, 0, 0, None)
+        if size >= HEADER.size + FOOTER.size:
+            index_offset, keyframes, frames, index_magic = FOOTER.unpack_from(self.data, size - FOOTER.size)
+        if index_magic == INDEX_MAGIC:
+            index = np.frombuffer(self.data, dtype=np.int64, count=2 * keyframes, offset=index_offset)
+            self.keyframes = index.reshape(-1, 2).copy()
+            self.frame_count = frames
+        else:
+            self.keyframes, self.frame_count = self.scan(size)
+
+    def scan(self, end):
+        keyframes = []
+        offset = HEADER.size
+        frames = 0
+        while offset + LENGTH.size <= end:
+            (length,) = LENGTH.unpack_from(self.data, offset)
+            if offset + LENGTH.size + length > end:
+                break  # Cut off mid-frame
+            try:
+                payload = zlib.decompress(self.data[offset + LENGTH.size:offset + LENGTH.size + length])
+            except zlib.error:
+                break  # Partly written frame or index
+            if payload[0] & KEYFRAME:
+                keyframes.append((frames, offset))
+            offset += LENGTH.size + length
+            frames += 1
+        return np.array(keyframes, dtype=np.int64).reshape(-1, 2), frames
+
+    def __len__(self):
+        return self.frame_count
+
+    def frames(self, start=0):
+        """Yield frames from frame number `start` to the end of the recording."""
+        if start >= self.frame_count:
+            return
+        position = max(0, np.searchsorted(self.keyframes[:, 0], start, side='right') - 1)
+        number, offset = self.keyframes[position].tolist()
+        previous = None
+        bonus = None
+        while number < self.frame_count:
+            (length,) = LENGTH.unpack_from(self.data, offset)
+            payload = zlib.decompress(self.data[offset + LENGTH.size:offset + LENGTH.size + length])
+            flags, tick, winner_tick, radius, winner, count, bonus_count = FRAME_HEADER.unpack_from(payload)
+
+            columns = []
+            cursor = FRAME_HEADER.size
+            for dtype in (np.int16, np.int16, np.int8, np.uint8):
+                size = np.dtype(dtype).itemsize
+                planes = np.frombuffer(payload, dtype=np.uint8, count=count * size, offset=cursor)
+                values = planes.reshape(size, count).T.copy().view(dtype).ravel()
+                cursor += values.nbytes
+                if not flags & KEYFRAME:
+                    padded = np.zeros(count, dtype=dtype)
+                    padded[:len(previous[len(columns)])] = previous[len(columns)]
+                    values = padded + values
+                columns.append(values)
+            if flags & BONUS_CHANGED:
+                bonus = np.frombuffer(payload, dtype=np.float32, count=2 * bonus_count,
+                                      offset=cursor).reshape(2, bonus_count)
+            previous = columns
+
+            if number >= start:
+                x, y, group, angle = columns
+                yield ReplayFrame(tick, GROUPS[winner - 1] if winner else None, winner_tick, radius,
+                                  x / self.position_scale, y / self.position_scale, group,
+                                  angle * (360 / ANGLE_STEPS), bonus[0], bonus[1])
+            offset += LENGTH.size + length
+            number += 1
+
+    def frame(self, number):
+        """Return frame `number`, decoding from the keyframe before it."""
+        return next(self.frames(number))
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+def record_match(path, seed=None, max_ticks=20000, config=None, strategic=False):
+    """Simulate one match headless as fast as possible, recording every tick to path."""
+    sim = Simulation(seed, strategic, config)
+    with ReplayWriter(path) as writer:
+        writer.record(sim)
+        while sim.ticks < max_ticks and not sim.winner:
+            sim.step()
+            writer.record(sim)
+    return sim
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Record a headless match to a replay file; watch it with main.py --replay FILE.")
+    parser.add_argument('output', help="replay file to write")
+    parser.add_argument('--seed', type=int, default=None, help="seed of the match")
+    parser.add_argument('--max-ticks', type=int, default=20000, help="stop recording after this many ticks")
+    parser.add_argument('--strategic', action='store_true', help="use the strategic movement rules")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule, e.g. --set flee_threshold=200")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sim = record_match(args.output, args.seed, args.max_ticks, Config(**dict(args.set)), args.strategic)
+    elapsed = time.perf_counter() - start
+    reader = ReplayReader(args.output)
+    size = len(reader.data)
+    print(f"Recorded {len(reader)} frames ({sim.winner or 'undecided'} after {sim.ticks} ticks) "
+          f"in {elapsed:.1f}s: {size / 1024:.0f} KiB, {size / len(reader):.0f} bytes/frame")
+    reader.close()
@@ -0,0 +1,940 @@
+import argparse
+import dataclasses
+import hashlib
+import json
+import math
+import time
+
+import numpy as np
+
+# Constants
+WINDOW_WIDTH = 960
+WINDOW_HEIGHT = 960
+DOT_RADIUS = 8
+BONUS_RADIUS = 6
+GLOBAL_MIN_SPEED = 0.1
+GLOBAL_MAX_SPEED = 1.2
+MIN_SPEED_RANGE = 0.3  # Minimum gap between min and max speed of a dot
+EATING_DISTANCE = 12  # Reduced from 15 to make eating harder
+CHASE_THRESHOLD = 300  # Reduced from 400 to make chasing more strategic
+FLEE_THRESHOLD = 150  # Increased from 100 to make dots more cautious
+INITIAL_DOTS_PER_GROUP = 90
+CIRCLE_SHRINK_SPEED = 0.4  # Reduced from 0.6 to give more time for strategy
+OUTSIDE_CIRCLE_FORCE = 8  # Reduced from 10 to make boundary less harsh
+INITIAL_CIRCLE_RADIUS = 660
+CRITICAL_POPULATION = 15  # Increased threshold for strategic behavior
+CRITICAL_RATIO = 0.25    # Increased ratio threshold
+ULTRA_PROTECTIVE_THRESHOLD = 8  # New threshold for ultra-protective behavior
+STALEMATE_TICKS = 60  # Ticks caught between prey and predator, alone, before a dot may break out
+GRID_CELL_SIZE = CHASE_THRESHOLD / 2  # Chase radius spans 2 cells, flee radius spans 1
+GRID_MAX_DEPTH = 6        # Dense grids may halve the cell size up to this many times
+GRID_CELL_OCCUPANCY = 4   # Average points per cell before subdividing
+GRID_FINE_RINGS = 2       # Rings searched on a subdivided level before falling back
+MOMENTUM_DECAY = 0.95
+TICK_RATE = 60  # Simulation ticks per second of match time
+BONUS_DURATION = 5 * TICK_RATE  # 5 seconds in ticks
+
+# Groups are stored as indices into GROUPS: Scissors, Paper, Rock
+GROUPS = ['A', 'B', 'C']
+PREY_GROUP = np.array([1, 2, 0])      # Group each group can eat
+PREDATOR_GROUP = np.array([2, 0, 1])  # Group that can eat each group
+
+# Speed distribution parameters
+POISSON_MEAN_A = 1.0  # Mean for group A's max speed
+POISSON_MEAN_B = 1.0  # Mean for group B's max speed
+POISSON_MEAN_C = 1.0  # Mean for group C's max speed
+
+# Targeting weights: prey is chased while prey distance * PREDATOR_WEIGHT < predator distance * PREY_WEIGHT
+PREY_WEIGHT = 1.5      # Increased from 1.0 to make prey more attractive
+PREDATOR_WEIGHT = 1.0
+
+@dataclasses.dataclass(frozen=True)
+class Config:
+    """The tunable rules of a match; the defaults are the module constants above.
+
+    Pass one to Simulation (or Game) to play by other rules, e.g.
+    Config(flee_threshold=200). Configs are immutable and hashable, and
+    digest() names one stably across processes and runs.
+    """
+
+    poisson_mean_a: float = POISSON_MEAN_A
+    poisson_mean_b: float = POISSON_MEAN_B
+    poisson_mean_c: float = POISSON_MEAN_C
+    eating_distance: float = EATING_DISTANCE
+    chase_threshold: float = CHASE_THRESHOLD
+    flee_threshold: float = FLEE_THRESHOLD
+    initial_dots_per_group: int = INITIAL_DOTS_PER_GROUP
+    circle_shrink_speed: float = CIRCLE_SHRINK_SPEED
+    outside_circle_force: float = OUTSIDE_CIRCLE_FORCE
+    prey_weight: float = PREY_WEIGHT
+    predator_weight: float = PREDATOR_WEIGHT
+
+    def __post_init__(self):
+        # Config(flee_threshold=200) is the same config as Config(flee_threshold=200.0)
+        for field in dataclasses.fields(self):
+            object.__setattr__(self, field.name, field.type(getattr(self, field.name)))
+        for name in ('eating_distance', 'chase_threshold', 'flee_threshold'):
+            if not getattr(self, name) > 0:
+                raise ValueError(f"{name} must be positive, not {getattr(self, name)}")
+        for name in ('poisson_mean_a', 'poisson_mean_b', 'poisson_mean_c', 'initial_dots_per_group',
+                     'circle_shrink_speed', 'outside_circle_force', 'prey_weight', 'predator_weight'):
+            if not getattr(self, name) >= 0:
+                raise ValueError(f"{name} must not be negative, not {getattr(self, name)}")
+
+    @property
+    def poisson_means(self):
+        return np.array([self.poisson_mean_a, self.poisson_mean_b, self.poisson_mean_c])
+
+    def replace(self, **changes):
+        return dataclasses.replace(self, **changes)
+
+    def asdict(self):
+        return dataclasses.asdict(self)
+
+    def digest(self, **extra):
+        """Return a short hex name for this config plus any extra settings that shape a match."""
+        text = json.dumps({'config': self.asdict(), **extra}, sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+def parse_setting(text):
+    """Parse NAME=VALUE into (Config field, value), for --set options."""
+    name, _, value = text.partition('=')
+    # The module constant names are accepted too, e.g. FLEE_THRESHOLD=200
+    name = name.strip().lower()
+    fields = {field.name: field.type for field in dataclasses.fields(Config)}
+    if name not in fields:
+        raise argparse.ArgumentTypeError(f"{name} is not one of {', '.join(fields)}")
+    try:
+        value = fields[name](value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a valid value for {name}")
+    try:
+        Config(**{name: value})
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+    return name, value
+
+def strategic_groups(populations):
+    """Return, for each group, whether its dots should be strategic.
+
+    Whether a dot turns strategic only depends on the group populations,
+    so every dot of a group gets the same answer.
+    """
+    populations = np.asarray(populations)
+    total_dots = populations.sum()
+    if total_dots == 0:
+        return np.zeros(len(GROUPS), dtype=bool)
+
+    prey = populations[PREY_GROUP]
+    predators = populations[PREDATOR_GROUP]
+    return (
+        (prey < CRITICAL_POPULATION) |                         # Prey population is low
+        (prey / total_dots < CRITICAL_RATIO) |                 # Prey ratio is low
+        (predators / total_dots > 0.4) |                       # Many predators
+        (populations.min() < ULTRA_PROTECTIVE_THRESHOLD) |     # Any group is endangered
+        (populations / total_dots > 0.5) |                     # We're becoming too dominant
+        (np.abs(prey - predators) < 5)                         # Balance is delicate
+    )
+
+class GridLevel:
+    """One resolution of a SpatialGrid: points bucketed into square cells.
+
+    Points are sorted by cell so each cell is a contiguous slice, and
+    searches walk outwards ring by ring, stopping as soon as no unvisited
+    cell can hold anything closer than the best match. Points can be split
+    into layers (e.g. one per group) that share the grid but are searched
+    separately.
+    """
+
+    def __init__(self, cell_size, layers=1):
+        self.cell_size = cell_size
+        self.cols = int(math.ceil(WINDOW_WIDTH / cell_size))
+        self.rows = int(math.ceil(WINDOW_HEIGHT / cell_size))
+        self.layers = layers
+        self.rings = {}
+
+    def cell_coords(self, xs, ys):
+        # Dots drifting past the window edge are clamped into the border cells
+        cx = np.clip(np.floor(xs / self.cell_size), 0, self.cols - 1).astype(np.intp)
+        cy = np.clip(np.floor(ys / self.cell_size), 0, self.rows - 1).astype(np.intp)
+        return cx, cy
+
+    def build(self, xs, ys, ids, layers=0):
+        cx, cy = self.cell_coords(xs, ys)
+        cells = layers * (self.cols * self.rows) + cy * self.cols + cx
+        order = np.argsort(cells, kind='stable')
+        self.xs = xs[order]
+        self.ys = ys[order]
+        self.ids = ids[order]
+        self.counts = np.bincount(cells, minlength=self.layers * self.cols * self.rows)
+        self.starts = np.cumsum(self.counts) - self.counts
+
+    def ring_offsets(self, r):
+        if r not in self.rings:
+            offsets = [(dx, dy)
+                       for dx in range(-r, r + 1)
+                       for dy in range(-r, r + 1)
+                       if max(abs(dx), abs(dy)) == r]
+            self.rings[r] = np.array(offsets, dtype=np.intp).T
+        return self.rings[r]
+
+    def ring_candidates(self, cx, cy, layers, r):
+        # Expand every (query, cell on ring r) combination into one entry per stored point
+        ox, oy = self.ring_offsets(r)
+        ncx = cx[:, None] + ox
+        ncy = cy[:, None] + oy
+        valid = (ncx >= 0) & (ncx < self.cols) & (ncy >= 0) & (ncy < self.rows)
+        queries = np.broadcast_to(np.arange(len(cx))[:, None], ncx.shape)[valid]
+        cells = (layers[:, None] * (self.cols * self.rows) + ncy * self.cols + ncx)[valid]
+        counts = self.counts[cells]
+        offsets = np.cumsum(counts) - counts
+        queries = np.repeat(queries, counts)
+        slots = np.repeat(self.starts[cells] - offsets, counts) + np.arange(counts.sum())
+        return queries, slots
+
+    def close_pairs(self, max_dist):
+        """Return ids (first, second), first < second, of every pair closer than max_dist.
+
+        Pairs come back sorted by first then second. The cell size must be at
+        least max_dist, so that close points share a cell or are neighbours,
+        and the points must all be in layer 0.
+        """
+        cx, cy = self.cell_coords(self.xs, self.ys)
+        cells = cy * self.cols + cx
+        slots = np.arange(len(self.xs))
+
+        # Points in the same cell are paired with the ones stored after them
+        ends = self.starts[cells] + self.counts[cells]
+        pairs = [self.expand(slots, slots + 1, ends - slots - 1)]
+        # Neighbouring cells are only looked at in one direction, so each pair shows up once
+        for ox, oy in [(1, 0), (-1, 1), (0, 1), (1, 1)]:
+            ncx, ncy = cx + ox, cy + oy
+            valid = (ncx >= 0) & (ncx < self.cols) & (ncy < self.rows)
+            neighbours = ncy[valid] * self.cols + ncx[valid]
+            pairs.append(self.expand(slots[valid], self.starts[neighbours], self.counts[neighbours]))
+
+        first = np.concatenate([a for a, _ in pairs])
+        second = np.concatenate([b for _, b in pairs])
+        dx = self.xs[first] - self.xs[second]
+        dy = self.ys[first] - self.ys[second]
+        close = np.sqrt(dx*dx + dy*dy) < max_dist
+
+        first, second = self.ids[first[close]], self.ids[second[close]]
+        first, second = np.minimum(first, second), np.maximum(first, second)
+        order = np.lexsort((second, first))
+        return first[order], second[order]
+
+    def expand(self, slots, starts, counts):
+        # One (slot, candidate slot) entry for each of the counts[k] slots from starts[k]
+        offsets = np.cumsum(counts) - counts
+        return (np.repeat(slots, counts),
+                np.repeat(starts - offsets, counts) + np.arange(counts.sum()))
+
+    def search(self, qx, qy, qlayers, active, best_ids, best_dists, max_dist, max_ring, exclude=None):
+        """Improve best_ids/best_dists for the active queries, in place.
+
+        Each query only looks at points in its own layer from qlayers, and
+        skips the point whose id is its entry in exclude, if given.
+        Returns the queries that are still unresolved after max_ring rings.
+        """
+        cx, cy = self.cell_coords(qx[active], qy[active])
+        layers = qlayers[active]
+        for r in range(max_ring + 1):
+            queries, slots = self.ring_candidates(cx, cy, layers, r)
+            if len(queries):
+                queries = active[queries]
+                dx = self.xs[slots] - qx[queries]
+                dy = self.ys[slots] - qy[queries]
+                dists = np.sqrt(dx*dx + dy*dy)
+                ids = self.ids[slots]
+
+                inside = dists < max_dist
+                if exclude is not None:
+                    inside &= ids != exclude[queries]
+                queries, dists, ids = queries[inside], dists[inside], ids[inside]
+
+            if len(queries):
+                # Candidates come out grouped by query, so reduce each run to its closest point
+                first = np.ones(len(queries), dtype=bool)
+                first[1:] = queries[1:] != queries[:-1]
+                starts = np.flatnonzero(first)
+                run_dists = np.minimum.reduceat(dists, starts)
+                tied_ids = np.where(dists == np.repeat(run_dists, np.diff(np.append(starts, len(dists)))),
+                                    ids, np.iinfo(np.intp).max)
+                queries, dists, ids = queries[starts], run_dists, np.minimum.reduceat(tied_ids, starts)
+
+                better = (dists < best_dists[queries]) | (
+                    (dists == best_dists[queries]) & (ids < best_ids[queries]))
+                best_dists[queries[better]] = dists[better]
+                best_ids[queries[better]] = ids[better]
+
+            # Anything beyond ring r is more than r cells away
+            unresolved = best_dists[active] > r * self.cell_size
+            active, cx, cy, layers = active[unresolved], cx[unresolved], cy[unresolved], layers[unresolved]
+            if len(active) == 0:
+                break
+
+        return active
+
+class SpatialGrid:
+    """Uniform grid over the arena, rebuilt from position arrays every tick.
+
+    The base cell size is tied to the flee/chase radii. When the points are
+    dense the grid is subdivided into finer levels, so close matches are
+    found without scanning crowded cells; queries that find nothing nearby
+    fall back to coarser levels to cover the rest of the radius.
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE, max_depth=GRID_MAX_DEPTH, layers=1):
+        self.levels = [GridLevel(cell_size / 2**depth, layers) for depth in range(max_depth + 1)]
+        self.layer_counts = np.zeros(layers, dtype=np.intp)
+        self.depth = 0
+
+    def build(self, xs, ys, ids, layers=None):
+        if layers is None:
+            layers = np.zeros(len(xs), dtype=np.intp)
+        else:
+            # Widen compact group codes so cell numbers cannot overflow
+            layers = layers.astype(np.intp)
+        self.layer_counts = np.bincount(layers, minlength=len(self.layer_counts))
+        self.depth = 0
+        if len(xs):
+            # Subdivide until an average occupied cell holds at most GRID_CELL_OCCUPANCY points per layer
+            area = max(np.ptp(xs) * np.ptp(ys), self.levels[-1].cell_size**2)
+            count = self.layer_counts.max()
+            while (self.depth < len(self.levels) - 1 and
+                   count * self.levels[self.depth].cell_size**2 / area > GRID_CELL_OCCUPANCY):
+                self.depth += 1
+        for level in self.levels[:self.depth + 1]:
+            level.build(xs, ys, ids, layers)
+
+    def nearest(self, qx, qy, max_dist, qlayers=None, exclude=None):
+        """Return (ids, distances) of the closest stored point strictly within max_dist.
+
+        Each query only matches points in its layer from qlayers, and never
+        the point whose id is its entry in exclude (e.g. the query itself).
+        Queries with no match get id -1 and distance inf. Ties go to the
+        smallest id, matching a linear scan that keeps the first minimum.
+        """
+        if qlayers is None:
+            qlayers = np.zeros(len(qx), dtype=np.intp)
+        best_ids = np.full(len(qx), -1, dtype=np.intp)
+        best_dists = np.full(len(qx), np.inf)
+
+        active = np.flatnonzero(self.layer_counts[qlayers] > 0)
+        for depth in range(self.depth, -1, -1):
+            if len(active) == 0:
+                break
+            level = self.levels[depth]
+            max_ring = int(math.ceil(max_dist / level.cell_size))
+            if depth > 0:
+                max_ring = min(max_ring, GRID_FINE_RINGS)
+            active = level.search(qx, qy, qlayers, active, best_ids, best_dists, max_dist, max_ring, exclude)
+
+        return best_ids, best_dists
+
+class Swarm:
+    """Structure-of-arrays storage for every dot in a match.
+
+    Each dot attribute lives in its own contiguous NumPy array, indexed by
+    dot number, so the per-tick passes in Game work on the whole population
+    at once. Dots are never removed, only converted, so indices are stable
+    and targets are stored as indices into the same arrays. Per-group counts
+    are kept up to date as dots are added and converted, so populations are
+    available without scanning the arrays.
+
+    Each field is a view of the used part of a larger buffer. Buffers grow
+    by doubling when dots are added and are kept by clear(), so later
+    matches refill the same memory instead of allocating new arrays.
+    """
+
+    FIELDS = [
+        # (name, dtype, default)
+        # Positions and momentum accumulate every tick, so they keep full precision
+        ('x', np.float64, 0.0),
+        ('y', np.float64, 0.0),
+        ('group', np.int8, 0),
+        ('target', np.int32, -1),
+        ('fleeing', np.bool_, False),
+        ('momentum_x', np.float64, 0.0),
+        ('momentum_y', np.float64, 0.0),
+        ('speed', np.float32, 0.0),
+        ('min_speed', np.float32, 0.0),
+        ('max_speed', np.float32, 0.0),
+        ('direction', np.float32, 0.0),
+        ('last_angle', np.float32, 0.0),
+        ('stalemate_timer', np.int32, 0),
+        ('bonus_multiplier', np.int8, 1),
+        ('bonus_tick', np.int32, 0),
+    ]
+
+    def __init__(self, rng, capacity=0, poisson_means=(POISSON_MEAN_A, POISSON_MEAN_B, POISSON_MEAN_C)):
+        self.rng = rng
+        self.poisson_means = np.asarray(poisson_means, dtype=float)
+        self.buffers = {name: np.empty(capacity, dtype=dtype) for name, dtype, _ in self.FIELDS}
+        self.size = 0
+        self.counts = np.zeros(len(GROUPS), dtype=np.intp)
+        self.expose()
+
+    def expose(self):
+        for name, _, _ in self.FIELDS:
+            setattr(self, name, self.buffers[name][:self.size])
+
+    def __len__(self):
+        return self.size
+
+    def add(self, xs, ys, groups):
+        """Add one dot per entry of xs, ys and groups, drawing every dot's speeds at once."""
+        groups = np.asarray(groups, dtype=np.intp)
+        count = len(groups)
+        # Initialize speed range based on Poisson distribution
+        # Generate max speed using Poisson distribution
+        max_speeds = np.clip(self.rng.poisson(self.poisson_means[groups]) / 5,  # Divide by 5 to scale to our speed range
+                             GLOBAL_MIN_SPEED + MIN_SPEED_RANGE, GLOBAL_MAX_SPEED)
+
+        # Generate min speed ensuring minimum gap
+        available_min = np.maximum(GLOBAL_MIN_SPEED, max_speeds - 1.4)  # Ensure within global range
+        available_max = max_speeds - MIN_SPEED_RANGE  # Ensure minimum gap
+        min_speeds = self.rng.uniform(available_min, available_max)
+
+        # Initialize current speed within the dot's range
+        speeds = self.rng.uniform(min_speeds, max_speeds)
+        directions = self.rng.uniform(0, 2 * math.pi, count)
+
+        self.extend({
+            'x': xs,
+            'y': ys,
+            'group': groups,
+            'min_speed': min_speeds,
+            'max_speed': max_speeds,
+            'speed': speeds,
+            'direction': directions
+        })
+
+    def extend(self, columns):
+        start = self.size
+        end = start + len(columns['x'])
+        self.reserve(end)
+        for name, _, default in self.FIELDS:
+            self.buffers[name][start:end] = columns.get(name, default)
+        self.size = end
+        self.expose()
+        self.counts += np.bincount(self.group[start:], minlength=len(GROUPS))
+
+    def reserve(self, capacity):
+        """Make room for at least `capacity` dots without moving the existing ones."""
+        current = len(self.buffers['x'])
+        if capacity <= current:
+            return
+        capacity = max(capacity, 2 * current)
+        for name, dtype, _ in self.FIELDS:
+            buffer = np.empty(capacity, dtype=dtype)
+            buffer[:self.size] = self.buffers[name][:self.size]
+            self.buffers[name] = buffer
+
+    def clear(self):
+        """Remove every dot, keeping the buffers for the next match."""
+        self.size = 0
+        self.counts[:] = 0
+        self.expose()
+
+    def convert(self, index, group):
+        """Move dot `index` into `group`, keeping the per-group counts in step."""
+        self.counts[self.group[index]] -= 1
+        self.counts[group] += 1
+        self.group[index] = group
+
+    def populations(self):
+        return self.counts.copy()
+
+class BonusDisks:
+    """The bonus disks on the field, stored as arrays and indexed by a grid.
+
+    Disks never move, so the grid is only rebuilt when disks are spawned.
+    A picked disk is just flagged dead; dead disks are dropped from the
+    arrays at the next spawn or once they make up half of the storage.
+    """
+
+    def __init__(self, eating_distance=EATING_DISTANCE):
+        self.eating_distance = eating_distance
+        self.grid = GridLevel(eating_distance)
+        self.clear()
+
+    def clear(self):
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.alive = np.empty(0, dtype=bool)
+        self.live = 0
+        self.grid.build(self.x, self.y, np.arange(0))
+
+    def __len__(self):
+        return self.live
+
+    def positions(self):
+        """Return the x and y arrays of the disks still on the field."""
+        return self.x[self.alive], self.y[self.alive]
+
+    def add(self, xs, ys):
+        self.x = np.concatenate([self.x, xs])
+        self.y = np.concatenate([self.y, ys])
+        self.alive = np.concatenate([self.alive, np.ones(len(xs), dtype=bool)])
+        self.reindex()
+
+    def load(self, xs, ys, alive):
+        """Replace every disk, keeping picked ones flagged dead rather than dropping them."""
+        self.x, self.y, self.alive = xs, ys, alive
+        self.live = int(alive.sum())
+        self.grid.build(self.x, self.y, np.arange(len(self.x)))
+
+    def reindex(self):
+        # Drop dead disks and rebuild the grid over the ones left
+        self.x, self.y = self.x[self.alive], self.y[self.alive]
+        self.alive = np.ones(len(self.x), dtype=bool)
+        self.live = len(self.x)
+        self.grid.build(self.x, self.y, np.arange(self.live))
+
+    def pick(self, xs, ys):
+        """Remove every disk within eating distance of a point and return who took it.
+
+        Each disk goes to the lowest-numbered point in reach. Returns the
+        sorted point numbers, once per disk taken.
+        """
+        if self.live == 0:
+            return np.empty(0, dtype=np.intp)
+
+        # The cells are one eating distance wide, so a disk in reach is in the 3x3 block around a point
+        cx, cy = self.grid.cell_coords(xs, ys)
+        layers = np.zeros(len(xs), dtype=np.intp)
+        queries, slots = [np.concatenate(parts) for parts in zip(
+            self.grid.ring_candidates(cx, cy, layers, 0),
+            self.grid.ring_candidates(cx, cy, layers, 1))]
+        disks = self.grid.ids[slots]
+        dx = xs[queries] - self.grid.xs[slots]
+        dy = ys[queries] - self.grid.ys[slots]
+        reached = (np.sqrt(dx*dx + dy*dy) < self.eating_distance) & self.alive[disks]
+        if not reached.any():
+            return np.empty(0, dtype=np.intp)
+
+        takers = np.full(len(self.x), len(xs), dtype=np.intp)
+        np.minimum.at(takers, disks[reached], queries[reached])
+        taken = np.flatnonzero(takers < len(xs))
+        self.alive[taken] = False
+        self.live -= len(taken)
+        if self.live * 2 < len(self.x):
+            self.reindex()
+        return np.sort(takers[taken])
+
+class Simulation:
+    """A Scissors-Paper-Rock match without any display.
+
+    Holds the full match state and the rules that advance it. Nothing here
+    touches pygame, so matches can be stepped as fast as the CPU allows,
+    e.g. for batch jobs on servers without a display. Game adds the window,
+    drawing and restart loop on top.
+
+    All randomness comes from one generator seeded with `seed`, and all
+    timing is counted in ticks, so the same seed plays out the same match
+    bit for bit however fast it is stepped. Matches started by reset_game
+    keep drawing from the same generator, and reuse the dot storage and
+    search grids of the previous match.
+
+    With `strategic` set, dots move by the population-aware rules of
+    move_strategically instead of the plain chase and flee of
+    move_towards_target. The tunable rules come from `config`, a Config.
+    """
+
+    def __init__(self, seed=None, strategic=False, config=None):
+        self.rng = np.random.default_rng(seed)
+        self.strategic = strategic
+        self.config = config = config or Config()
+        self.dots = Swarm(self.rng, config.initial_dots_per_group * len(GROUPS), config.poisson_means)
+        self.bonus_disks = BonusDisks(config.eating_distance)
+        # Chase radius spans 2 cells, flee radius spans 1
+        self.target_grid = SpatialGrid(config.chase_threshold / 2, layers=len(GROUPS))
+        self.collision_grid = GridLevel(config.eating_distance)
+        self.match = -1  # Matches started by reset_game before the current one
+        self.reset_game()
+
+    def reset_game(self):
+        self.match += 1
+        self.dots.clear()
+        self.circle_center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+        self.circle_radius = INITIAL_CIRCLE_RADIUS
+        self.bonus_disks.clear()
+        self.bonus_spawned = {
+            0.7: False,
+            0.8: False,
+            0.6: False,
+            0.4: False
+        }
+        self.winner = None
+        self.winner_tick = 0
+        self.last_collision_tick = 0
+        self.ticks = 0
+        # Events of the last tick: dots converted into each group, bonus disks picked up
+        self.conversions = np.zeros(len(GROUPS), dtype=np.intp)
+        self.pickups = 0
+        self.initialize_dots()
+
+    def step(self):
+        """Advance the match by one tick."""
+        self.conversions[:] = 0
+        self.pickups = 0
+        self.circle_radius -= self.config.circle_shrink_speed
+        if self.circle_radius < 0:
+            self.circle_radius = 0
+
+        current_ratio = self.circle_radius / INITIAL_CIRCLE_RADIUS
+
+        # Check for bonus disk spawning at different thresholds
+        for threshold in [0.8, 0.7, 0.6, 0.4]:
+            if not self.bonus_spawned[threshold] and current_ratio <= threshold:
+                self.spawn_bonus_disks(10 if threshold == 0.7 else 8)
+                self.bonus_spawned[threshold] = True
+
+        if not self.winner:
+            self.update_targets()
+            self.update_bonuses()
+            if self.strategic:
+                self.move_strategically()
+            else:
+                self.move_towards_target()
+            self.force_towards_circle()
+
+            if self.handle_collisions():
+                self.last_collision_tick = self.ticks
+            self.handle_bonus_collisions()
+
+        self.check_winner()
+        self.ticks += 1
+
+    def run(self, n_ticks):
+        """Step until a group has won or n_ticks ticks have passed; return the winner."""
+        for _ in range(n_ticks):
+            if self.winner:
+                break
+            self.step()
+        return self.winner
+
+    def initialize_dots(self):
+        per_group = self.config.initial_dots_per_group
+        count = per_group * len(GROUPS)
+        xs = self.rng.integers(DOT_RADIUS, WINDOW_WIDTH - DOT_RADIUS, count, endpoint=True)
+        ys = self.rng.integers(DOT_RADIUS, WINDOW_HEIGHT - DOT_RADIUS, count, endpoint=True)
+        groups = np.repeat(np.arange(len(GROUPS)), per_group)
+        self.dots.add(xs, ys, groups)
+
+    def spawn_bonus_disks(self, count=40):
+        xs, ys = [], []
+        for _ in range(count):
+            angle = self.rng.uniform(0, 2 * math.pi)
+            distance = self.rng.uniform(0, self.circle_radius)
+            xs.append(self.circle_center[0] + distance * math.cos(angle))
+            ys.append(self.circle_center[1] + distance * math.sin(angle))
+        self.bonus_disks.add(xs, ys)
+
+    def handle_bonus_collisions(self):
+        dots = self.dots
+        # The first dot to reach a disk takes it
+        pickups = self.bonus_disks.pick(dots.x, dots.y)
+        self.pickups = len(pickups)
+        if len(pickups) == 0:
+            return
+
+        dots.bonus_multiplier[pickups] = 5
+        dots.bonus_tick[pickups] = self.ticks
+        dots.add(dots.x[pickups] + self.rng.uniform(-10, 10, len(pickups)),
+                 dots.y[pickups] + self.rng.uniform(-10, 10, len(pickups)),
+                 dots.group[pickups])
+
+    def update_bonuses(self):
+        expired = (self.dots.bonus_multiplier > 1) & (
+            self.ticks - self.dots.bonus_tick > BONUS_DURATION)
+        self.dots.bonus_multiplier[expired] = 1
+
+    def update_targets(self):
+        config = self.config
+        dots = self.dots
+        count = len(dots)
+
+        # One grid layer per group, so each query only walks cells of the group it cares about
+        self.target_grid.build(dots.x, dots.y, np.arange(count), dots.group)
+        # Prioritize closer prey
+        prey_ids, prey_dists = self.target_grid.nearest(
+            dots.x, dots.y, config.chase_threshold, PREY_GROUP[dots.group])
+        # Be less afraid of predators
+        predator_ids, predator_dists = self.target_grid.nearest(
+            dots.x, dots.y, config.flee_threshold, PREDATOR_GROUP[dots.group])
+
+        # More likely to chase prey even when predator is nearby
+        chasing = (prey_ids >= 0) & ((predator_ids < 0) | (
+            prey_dists * config.predator_weight < predator_dists * config.prey_weight))
+        fleeing = ~chasing & (predator_ids >= 0)
+        dots.target[:] = np.where(chasing, prey_ids, np.where(fleeing, predator_ids, -1))
+        dots.fleeing[:] = fleeing
+
+        # Random movement when no targets, 2% chance each frame
+        wandering = np.flatnonzero((dots.target < 0) & (self.rng.random(count) < 0.02))
+        angles = self.rng.uniform(0, 2 * math.pi, len(wandering))
+        dots.momentum_x[wandering] = np.cos(angles) * GLOBAL_MAX_SPEED * 0.5
+        dots.momentum_y[wandering] = np.sin(angles) * GLOBAL_MAX_SPEED * 0.5
+
+    def move_towards_target(self):
+        dots = self.dots
+        chasers = np.flatnonzero(dots.target >= 0)
+        targets = dots.target[chasers]
+        dx = dots.x[targets] - dots.x[chasers]
+        dy = dots.y[targets] - dots.y[chasers]
+        distance = np.sqrt(dx*dx + dy*dy)
+
+        moving = distance > 0
+        chasers = chasers[moving]
+        # Normalize direction, reversed when fleeing
+        fleeing = dots.fleeing[chasers]
+        dx = np.where(fleeing, -1.0, 1.0) * dx[moving] / distance[moving]
+        dy = np.where(fleeing, -1.0, 1.0) * dy[moving] / distance[moving]
+
+        # Apply force based on whether fleeing or chasing
+        force = np.where(fleeing,
+                         GLOBAL_MIN_SPEED + (GLOBAL_MAX_SPEED - GLOBAL_MIN_SPEED) * 0.7,  # Slower when fleeing
+                         GLOBAL_MIN_SPEED + (GLOBAL_MAX_SPEED - GLOBAL_MIN_SPEED))        # Full speed when chasing
+
+        # Add some randomness to movement
+        dx += self.rng.uniform(-0.2, 0.2, len(chasers))
+        dy += self.rng.uniform(-0.2, 0.2, len(chasers))
+
+        # Update momentum with more aggressive acceleration
+        dots.momentum_x[chasers] = dots.momentum_x[chasers] * MOMENTUM_DECAY + dx * force * 0.2
+        dots.momentum_y[chasers] = dots.momentum_y[chasers] * MOMENTUM_DECAY + dy * force * 0.2
+
+        # Apply momentum
+        dots.x += dots.momentum_x
+        dots.y += dots.momentum_y
+
+    def move_strategically(self):
+        """Move every dot by the population-aware rules, all dots at once.
+
+        A dot flees a predator within the flee threshold. Otherwise it
+        chases its prey, unless its group is strategic: then it backs away
+        from the last few prey, circles or shadows prey that are getting
+        scarce, and otherwise stalks at a moderate distance. A dot caught
+        between its prey and predator, with no friend near, for over
+        STALEMATE_TICKS ticks may break out with a random burst.
+
+        Whether a dot is strategic only depends on the group populations, so
+        it is decided once per group from the running counts. Nearby groups
+        and the nearest predator are found with the target grid, which
+        update_targets has just built over the same positions, so no dot
+        scans every other dot. All dots move from where they were at the
+        start of the pass.
+        """
+        config = self.config
+        dots = self.dots
+        rng = self.rng
+        count = len(dots)
+        ids = np.arange(count)
+        groups = dots.group.astype(np.intp)
+        x, y = dots.x, dots.y
+
+        # Randomly adjust speed within each dot's personal range, 5% chance each tick
+        adjusting = rng.random(count) < 0.05
+        adjusted = np.clip(dots.speed + rng.uniform(-0.1, 0.1, count), dots.min_speed, dots.max_speed)
+        dots.speed[:] = np.where(adjusting, adjusted, dots.speed)
+        speed = dots.speed.astype(np.float64)
+
+        populations = dots.counts
+        being_strategic = strategic_groups(populations)[groups]
+        base_x = np.cos(dots.direction) * speed * 0.3
+        base_y = np.sin(dots.direction) * speed * 0.3
+
+        # A dot is in a stalemate when its prey and predator are both near and its own group is not
+        nearby = config.chase_threshold * 0.5
+        _, prey_dists = self.target_grid.nearest(x, y, nearby, PREY_GROUP[groups])
+        predator_ids, predator_dists = self.target_grid.nearest(
+            x, y, max(nearby, config.flee_threshold), PREDATOR_GROUP[groups])
+        friend_ids, _ = self.target_grid.nearest(x, y, nearby, groups, exclude=ids)
+        stalemate = (prey_dists < nearby) & (predator_dists < nearby) & (friend_ids < 0)
+        dots.stalemate_timer[:] = np.where(stalemate, dots.stalemate_timer + 1,
+                                           np.maximum(0, dots.stalemate_timer - 1))
+
+        # Long stalemates are broken by a burst in a random direction
+        bursting = (dots.stalemate_timer > STALEMATE_TICKS) & (rng.random(count) < 0.1)
+        burst_angles = rng.uniform(0, 2 * math.pi, count)
+        dots.momentum_x[bursting] += np.cos(burst_angles[bursting]) * speed[bursting] * 2
+        dots.momentum_y[bursting] += np.sin(burst_angles[bursting]) * speed[bursting] * 2
+        dots.stalemate_timer[bursting] = 0
+
+        dx = np.zeros(count)
+        dy = np.zeros(count)
+        has_target = dots.target >= 0
+
+        # A predator in reach outweighs the target
+        fleeing = has_target & (predator_dists < config.flee_threshold)
+        dots.fleeing[has_target] = fleeing[has_target]
+        predators = np.where(fleeing, predator_ids, ids)
+        flee_dx = x - x[predators]
+        flee_dy = y - y[predators]
+        flee_dist = np.sqrt(flee_dx**2 + flee_dy**2)
+        flee_multiplier = rng.uniform(0.8, 1.2, count)
+        away = fleeing & (flee_dist > 0)
+        flee_dist[~away] = 1
+        dx = np.where(away, flee_dx / flee_dist * speed * flee_multiplier, dx)
+        dy = np.where(away, flee_dy / flee_dist * speed * flee_multiplier, dy)
+
+        # Otherwise close in on prey, carefully if the group is strategic
+        targets = np.where(has_target, dots.target, ids)
+        target_dx = x[targets] - x
+        target_dy = y[targets] - y
+        distance = np.sqrt(target_dx**2 + target_dy**2)
+        hunting = has_target & ~fleeing & (groups[targets] == PREY_GROUP[groups]) & (distance > 0)
+        distance[~hunting] = 1
+        towards_x, towards_y = target_dx / distance, target_dy / distance
+        sideways_x, sideways_y = -towards_y, towards_x
+        in_range = distance < config.chase_threshold
+
+        # Normal hunting behavior
+        chasing = hunting & ~being_strategic & in_range
+        dx += np.where(chasing, towards_x * speed, 0)
+        dy += np.where(chasing, towards_y * speed, 0)
+
+        # Strategic movement, depending on how few prey are left
+        careful = hunting & being_strategic
+        prey_population = populations[PREY_GROUP[groups]]
+        ultra_protective = prey_population < ULTRA_PROTECTIVE_THRESHOLD
+        protective = ~ultra_protective & (prey_population < CRITICAL_POPULATION)
+
+        # Actively avoid the last remaining prey, moving towards the center if too far from it
+        avoiding = careful & ultra_protective & in_range
+        dx += np.where(avoiding, -towards_x * speed * 1.2, 0)
+        dy += np.where(avoiding, -towards_y * speed * 1.2, 0)
+        to_center_x = self.circle_center[0] - x
+        to_center_y = self.circle_center[1] - y
+        center_dist = np.sqrt(to_center_x**2 + to_center_y**2)
+        centering = avoiding & (center_dist > WINDOW_WIDTH / 4)
+        center_dist[~centering] = 1
+        dx += np.where(centering, to_center_x / center_dist * speed * 0.4, 0)
+        dy += np.where(centering, to_center_y / center_dist * speed * 0.4, 0)
+
+        # Protective: move sideways relative to close prey, keep distance from the rest
+        close = distance < config.eating_distance * 4
+        circling = careful & protective & close
+        dx += np.where(circling, sideways_x * speed * 0.8, 0)
+        dy += np.where(circling, sideways_y * speed * 0.8, 0)
+        shadowing = careful & protective & ~close & in_range
+        dx += np.where(shadowing, towards_x * speed * 0.2, 0)
+        dy += np.where(shadowing, towards_y * speed * 0.2, 0)
+
+        # Otherwise keep a moderate distance, sometimes circling the prey
+        stalking = careful & ~ultra_protective & ~protective & in_range
+        dx += np.where(stalking, towards_x * speed * 0.4, 0)
+        dy += np.where(stalking, towards_y * speed * 0.4, 0)
+        orbiting = stalking & (rng.random(count) < 0.3)
+        dx += np.where(orbiting, sideways_x * speed * 0.3, 0)
+        dy += np.where(orbiting, sideways_y * speed * 0.3, 0)
+
+        # Add some randomness to prevent predictable patterns
+        wobbling = careful & (rng.random(count) < 0.15)
+        dx += np.where(wobbling, rng.uniform(-0.3, 0.3, count) * speed, 0)
+        dy += np.where(wobbling, rng.uniform(-0.3, 0.3, count) * speed, 0)
+
+        # Strategic groups move more randomly overall
+        restless = being_strategic & (rng.random(count) < 0.15)
+        dx += np.where(restless, rng.uniform(-0.7, 0.7, count) * speed, 0)
+        dy += np.where(restless, rng.uniform(-0.7, 0.7, count) * speed, 0)
+
+        dots.momentum_x *= MOMENTUM_DECAY
+        dots.momentum_y *= MOMENTUM_DECAY
+        dots.momentum_x += rng.uniform(-0.1, 0.1, count) * speed
+        dots.momentum_y += rng.uniform(-0.1, 0.1, count) * speed
+
+        dots.x += base_x + dx + dots.momentum_x
+        dots.y += base_y + dy + dots.momentum_y
+
+        # Bounce off the window edges
+        hit_x = (dots.x <= DOT_RADIUS) | (dots.x >= WINDOW_WIDTH - DOT_RADIUS)
+        dots.direction[:] = np.where(hit_x, math.pi - dots.direction, dots.direction)
+        np.clip(dots.x, DOT_RADIUS, WINDOW_WIDTH - DOT_RADIUS, out=dots.x)
+        hit_y = (dots.y <= DOT_RADIUS) | (dots.y >= WINDOW_HEIGHT - DOT_RADIUS)
+        dots.direction[:] = np.where(hit_y, -dots.direction, dots.direction)
+        np.clip(dots.y, DOT_RADIUS, WINDOW_HEIGHT - DOT_RADIUS, out=dots.y)
+
+    def handle_collisions(self):
+        dots = self.dots
+        self.collision_grid.build(dots.x, dots.y, np.arange(len(dots)))
+        firsts, seconds = self.collision_grid.close_pairs(self.config.eating_distance)
+        if len(firsts) == 0:
+            return False
+
+        # Conversions are applied in pair order, so later pairs see earlier ones
+        groups = dots.group.tolist()
+        counts = dots.counts.tolist()
+        conversions = [0] * len(GROUPS)
+        prey_groups = PREY_GROUP.tolist()
+        collision_occurred = False
+        for i, j in zip(firsts.tolist(), seconds.tolist()):
+            if prey_groups[groups[i]] == groups[j]:
+                counts[groups[j]] -= 1
+                counts[groups[i]] += 1
+                conversions[groups[i]] += 1
+                groups[j] = groups[i]
+                collision_occurred = True
+            elif prey_groups[groups[j]] == groups[i]:
+                counts[groups[i]] -= 1
+                counts[groups[j]] += 1
+                conversions[groups[j]] += 1
+                groups[i] = groups[j]
+                collision_occurred = True
+        if collision_occurred:
+            dots.group[:] = groups
+            dots.counts[:] = counts
+            self.conversions[:] = conversions
+        return collision_occurred
+
+    def check_winner(self):
+        groups = dict(zip(GROUPS, self.dots.counts.tolist()))
+
+        for group, count in groups.items():
+            if count == len(self.dots):
+                if not self.winner:
+                    self.winner = group
+                    self.winner_tick = self.ticks
+                return True
+        return False
+
+    def is_inside_circle(self, x, y):
+        distance_to_center = np.sqrt((x - self.circle_center[0])**2 + (y - self.circle_center[1])**2)
+        return distance_to_center <= self.circle_radius
+
+    def force_towards_circle(self):
+        dots = self.dots
+        outside = np.flatnonzero(~self.is_inside_circle(dots.x, dots.y))
+        dx = self.circle_center[0] - dots.x[outside]
+        dy = self.circle_center[1] - dots.y[outside]
+        distance = np.sqrt(dx**2 + dy**2)
+        pushed = distance > 0
+        outside = outside[pushed]
+        force = self.config.outside_circle_force
+        dots.x[outside] += (dx[pushed]/distance[pushed]) * force
+        dots.y[outside] += (dy[pushed]/distance[pushed]) * force
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Scissors-Paper-Rock matches without a display.")
+    parser.add_argument('--matches', type=int, default=1, help="number of matches to play")
+    parser.add_argument('--max-ticks', type=int, default=20000, help="give up on a match after this many ticks")
+    parser.add_argument('--seed', type=int, default=None, help="seed of the first match; match i uses seed + i")
+    parser.add_argument('--strategic', action='store_true', help="use the population-aware strategic movement")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule, e.g. --set flee_threshold=200")
+    args = parser.parse_args()
+    config = Config(**dict(args.set))
+
+    start = time.perf_counter()
+    total_ticks = 0
+    for match in range(args.matches):
+        seed = args.seed + match if args.seed is not None else None
+        simulation = Simulation(seed, args.strategic, config)
+        winner = simulation.run(args.max_ticks)
+        total_ticks += simulation.ticks
+        print(f"Match {match + 1} (seed {seed}): {winner or 'undecided'} after {simulation.ticks} ticks")
+    elapsed = time.perf_counter() - start
+    print(f"{args.matches} matches, {total_ticks} ticks in {elapsed:.1f}s ({total_ticks / elapsed:.0f} ticks/s)")
@@ -0,0 +1,117 @@
+import threading
+
+import numpy as np
+
+from simulation import GROUPS
+
+class Snapshot:
+    """A copy of everything needed to draw one tick of a match.
+
+    Drawing only ever reads a Snapshot, never the Simulation, so a match
+    can keep stepping on another thread while the last tick is drawn. The
+    arrays are views into buffers that are reused from one capture to the
+    next and only grow when the match outgrows them.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+        self.time = 0.0  # When the captured tick was due, in time.perf_counter() seconds
+        self.ticks = 0
+        self.winner = None
+        self.winner_tick = 0
+        self.circle_center = (0, 0)
+        self.circle_radius = 0
+        self.populations = np.zeros(len(GROUPS), dtype=np.intp)
+        for name in ('x', 'y', 'previous_x', 'previous_y', 'angle', 'bonus_x', 'bonus_y'):
+            setattr(self, name, np.zeros(0))
+        self.group = np.zeros(0, dtype=np.int8)
+
+    def store(self, name, values):
+        """Copy values into the buffer kept for name and expose them as self.<name>."""
+        count = len(values)
+        buffer = self.buffers.get(name)
+        if buffer is None or len(buffer) < count or buffer.dtype != values.dtype:
+            buffer = np.empty(max(count, 2 * len(buffer) if buffer is not None else 0), dtype=values.dtype)
+            self.buffers[name] = buffer
+        view = buffer[:count]
+        view[:] = values
+        setattr(self, name, view)
+
+    def capture(self, game, time=0.0):
+        """Copy the drawable state of game, which must not be stepped meanwhile."""
+        dots = game.dots
+        # Sprites face the way a dot last moved
+        moving = (dots.momentum_x != 0) | (dots.momentum_y != 0)
+        dots.last_angle[moving] = np.degrees(np.arctan2(-dots.momentum_y[moving], dots.momentum_x[moving]))
+
+        self.store('x', dots.x)
+        self.store('y', dots.y)
+        # Dots spawned by the last tick have no earlier position and are drawn where they are
+        kept = min(len(game.previous_x), len(dots))
+        self.store('previous_x', dots.x)
+        self.store('previous_y', dots.y)
+        self.previous_x[:kept] = game.previous_x[:kept]
+        self.previous_y[:kept] = game.previous_y[:kept]
+        self.store('group', dots.group)
+        self.store('angle', dots.last_angle)
+        bonus_x, bonus_y = game.bonus_disks.positions()
+        self.store('bonus_x', bonus_x)
+        self.store('bonus_y', bonus_y)
+        self.store('populations', dots.counts)
+
+        self.time = time
+        self.ticks = game.ticks
+        self.winner = game.winner
+        self.winner_tick = game.winner_tick
+        self.circle_center = game.circle_center
+        self.circle_radius = game.circle_radius
+
+    def load_replay(self, frame, circle_center):
+        """Copy a ReplayFrame, which has nothing to interpolate from."""
+        for name in ('x', 'y', 'group', 'angle', 'bonus_x', 'bonus_y'):
+            self.store(name, getattr(frame, name))
+        self.store('previous_x', frame.x)
+        self.store('previous_y', frame.y)
+        self.store('populations', np.bincount(frame.group, minlength=len(GROUPS)))
+        self.ticks = frame.tick
+        self.winner = frame.winner
+        self.winner_tick = frame.winner_tick
+        self.circle_center = circle_center
+        self.circle_radius = frame.circle_radius
+
+    def positions(self, alpha=1.0):
+        """Return dot positions `alpha` of the way from before the captured tick to after it."""
+        if alpha >= 1:
+            return self.x, self.y
+        return (self.previous_x + alpha * (self.x - self.previous_x),
+                self.previous_y + alpha * (self.y - self.previous_y))
+
+class SnapshotExchange:
+    """Passes the newest Snapshot from a simulation thread to a render thread.
+
+    Three snapshots rotate between the two sides: the simulation fills
+    `back` while the renderer draws `front`, and the newest complete one
+    waits in between. Handing one over only swaps references under a lock,
+    so neither thread ever waits for the other to finish its work.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.back = Snapshot()
+        self.ready = Snapshot()
+        self.front = Snapshot()
+        self.fresh = False
+
+    def publish(self):
+        """Offer the filled back snapshot to the renderer and take a free one to fill next."""
+        with self.lock:
+            self.back, self.ready = self.ready, self.back
+            self.fresh = True
+
+    def acquire(self):
+        """Return the newest published snapshot; it stays valid until the next acquire()."""
+        with self.lock:
+            if self.fresh:
+                self.front, self.ready = self.ready, self.front
+                self.fresh = False
+        return self.front
@@ -0,0 +1,135 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import Config, parse_setting
+from tournament import TournamentResults, run_match
+
+class ResultCache:
+    """Match results on disk, keyed by (config digest, seed).
+
+    Each config has a JSON lines file named after its digest, holding one
+    result per seed, and a .json file describing the config. Results are
+    only ever appended, so a sweep that is stopped part way keeps every
+    match it finished. The digest covers the Config and the settings of
+    the run (max ticks, strategic movement), but not the code: clear the
+    cache after changing the rules of the game.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.loaded = {}
+
+    def results(self, key):
+        """Return {seed: result} of every cached match of one config."""
+        if key not in self.loaded:
+            results = {}
+            path = os.path.join(self.directory, f'{key}.jsonl')
+            if os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        try:
+                            result = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Partly written line from an interrupted sweep
+                        results[result['seed']] = result
+            self.loaded[key] = results
+        return self.loaded[key]
+
+    def get(self, key, seed):
+        return self.results(key).get(seed)
+
+    def put(self, key, result, description=None):
+        results = self.results(key)
+        if not results and description is not None:
+            with open(os.path.join(self.directory, f'{key}.json'), 'w') as f:
+                json.dump(description, f, indent=2)
+        results[result['seed']] = result
+        with open(os.path.join(self.directory, f'{key}.jsonl'), 'a') as f:
+            f.write(json.dumps(result) + '\n')
+
+def grid(axes, base=None):
+    """Yield one Config per combination of values in axes, {field: [values]}, on top of base."""
+    base = base or Config()
+    names = list(axes)
+    for values in itertools.product(*(axes[name] for name in names)):
+        yield base.replace(**dict(zip(names, values)))
+
+def run_sweep(configs, matches, cache, seed=0, max_ticks=20000, strategic=False, workers=None):
+    """Play `matches` seeded matches of every config, skipping the ones already in cache.
+
+    Match i of every config is seeded with seed + i, so configs are compared
+    on the same starting positions. Yields (config, result, cached) as
+    results become available: cached ones first, then new ones in
+    completion order.
+    """
+    configs = list(configs)
+    keys = [config.digest(max_ticks=max_ticks, strategic=strategic) for config in configs]
+    pending = []
+    for config, key in zip(configs, keys):
+        for match_seed in range(seed, seed + matches):
+            result = cache.get(key, match_seed)
+            if result is not None:
+                yield config, result, True
+            else:
+                pending.append((config, key, match_seed))
+    if not pending:
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only the final populations are kept; the curve would dominate the cache
+        futures = {executor.submit(run_match, match_seed, config, max_ticks, max_ticks, strategic): (config, key)
+                   for config, key, match_seed in pending}
+        for future in as_completed(futures):
+            config, key = futures[future]
+            result = future.result()
+            result['populations'] = result['populations'][-1]
+            cache.put(key, result, {'config': config.asdict(), 'max_ticks': max_ticks, 'strategic': strategic})
+            yield config, result, False
+
+def parse_axis(text):
+    """Parse NAME=V1,V2,... into (Config field, [values]), for --vary options."""
+    name, _, values = text.partition('=')
+    parsed = [parse_setting(f'{name}={value}') for value in values.split(',') if value]
+    if not parsed:
+        raise argparse.ArgumentTypeError(f"no values given for {name}")
+    return parsed[0][0], [value for _, value in parsed]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Estimate win probabilities over a grid of rule settings, caching every match played.")
+    parser.add_argument('--vary', type=parse_axis, action='append', default=[], metavar='NAME=V1,V2,...',
+                        help="values of one rule to sweep over, e.g. --vary flee_threshold=100,150,200")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule for every config of the sweep")
+    parser.add_argument('--matches', type=int, default=50, help="matches per config")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first match; match i uses seed + i")
+    parser.add_argument('--max-ticks', type=int, default=20000, help="give up on a match after this many ticks")
+    parser.add_argument('--strategic', action='store_true', help="use the strategic movement rules")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument('--cache', default='sweep_cache', help="directory of cached match results")
+    args = parser.parse_args()
+
+    axes = dict(args.vary)
+    configs = list(grid(axes, Config(**dict(args.set))))
+    totals = {config: TournamentResults() for config in configs}
+    cache = ResultCache(args.cache)
+    played = cached = 0
+    start = time.perf_counter()
+    for config, result, was_cached in run_sweep(configs, args.matches, cache, args.seed, args.max_ticks,
+                                                args.strategic, args.workers):
+        totals[config].add(result)
+        cached += was_cached
+        played += not was_cached
+        if not was_cached and played % max(1, len(configs) * args.matches // 20) == 0:
+            print(f"{played} matches played, {cached} cached", flush=True)
+    elapsed = time.perf_counter() - start
+
+    for config, results in totals.items():
+        settings = ", ".join(f"{name}={getattr(config, name)}" for name in axes) or "defaults"
+        print(f"{settings}: {results.summary()}")
+    print(f"{played} matches played and {cached} taken from {args.cache} in {elapsed:.1f}s")
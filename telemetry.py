@@ -0,0 +1,111 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from simulation import GROUPS, Config, Simulation, parse_setting, strategic_groups
+
+# One record per tick
+TELEMETRY_DTYPE = np.dtype([
+    ('match', np.int32),                        # Number of the match within the run, from 0
+    ('tick', np.int64),
+    ('population', np.int32, (len(GROUPS),)),   # Dots in each group after the tick
+    ('conversions', np.int32, (len(GROUPS),)),  # Dots converted into each group during the tick
+    ('pickups', np.int32),                      # Bonus disks picked up during the tick
+    ('circle_radius', np.float32),
+    ('strategic', np.int32),                    # Dots moving strategically, 0 unless sim.strategic
+])
+CHUNK_TICKS = 65536  # Records held in memory before a chunk is written, about 2.4 MB
+
+def sample(sim, match=None):
+    """Return the telemetry record of the tick sim has just played, as a tuple.
+
+    The record holds copies, so it stays valid as sim plays on. match
+    defaults to the number of matches sim has started before this one.
+    """
+    populations = sim.dots.counts.copy()
+    strategic = populations[strategic_groups(populations)].sum() if sim.strategic else 0
+    return (sim.match if match is None else match, sim.ticks, populations, sim.conversions.copy(), sim.pickups,
+            sim.circle_radius, strategic)
+
+def stream(sim, max_ticks=None, match=None):
+    """Step sim until a group wins (or max_ticks ticks), yielding a record after every tick."""
+    while not sim.winner and (max_ticks is None or sim.ticks < max_ticks):
+        sim.step()
+        yield sample(sim, match)
+
+class TelemetrySink:
+    """Collect records in a fixed-size buffer and save each full buffer as a .npy chunk.
+
+    Chunks are numbered files in `directory`, so memory stays bounded
+    however long the run is, and the chunks can later be read one at a
+    time with chunks() or all together with load().
+    """
+
+    def __init__(self, directory, chunk_ticks=CHUNK_TICKS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.buffer = np.zeros(chunk_ticks, dtype=TELEMETRY_DTYPE)
+        self.filled = 0
+        self.chunks = len(glob.glob(os.path.join(directory, 'chunk_*.npy')))
+        self.records = 0
+
+    def write(self, record):
+        self.buffer[self.filled] = record
+        self.filled += 1
+        self.records += 1
+        if self.filled == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.filled == 0:
+            return
+        np.save(os.path.join(self.directory, f'chunk_{self.chunks:06d}.npy'), self.buffer[:self.filled])
+        self.chunks += 1
+        self.filled = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def chunks(directory):
+    """Yield the saved chunks of a telemetry directory in order, memory-mapped."""
+    for path in sorted(glob.glob(os.path.join(directory, 'chunk_*.npy'))):
+        yield np.load(path, mmap_mode='r')
+
+def load(directory):
+    """Return every record of a telemetry directory as one array."""
+    parts = list(chunks(directory))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=TELEMETRY_DTYPE)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play headless matches and save per-tick populations and events as .npy chunks.")
+    parser.add_argument('output', help="directory to write the chunks to")
+    parser.add_argument('--matches', type=int, default=1, help="number of matches to play")
+    parser.add_argument('--seed', type=int, default=None, help="seed of the first match; match i uses seed + i")
+    parser.add_argument('--max-ticks', type=int, default=20000, help="give up on a match after this many ticks")
+    parser.add_argument('--chunk-ticks', type=int, default=CHUNK_TICKS, help="records per saved chunk")
+    parser.add_argument('--strategic', action='store_true', help="use the strategic movement rules")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule, e.g. --set flee_threshold=200")
+    args = parser.parse_args()
+
+    config = Config(**dict(args.set))
+    start = time.perf_counter()
+    with TelemetrySink(args.output, args.chunk_ticks) as sink:
+        for match in range(args.matches):
+            seed = args.seed + match if args.seed is not None else None
+            sim = Simulation(seed, args.strategic, config)
+            for record in stream(sim, args.max_ticks, match):
+                sink.write(record)
+            print(f"Match {match + 1} (seed {seed}): {sim.winner or 'undecided'} after {sim.ticks} ticks")
+    elapsed = time.perf_counter() - start
+    print(f"{sink.records} records in {sink.chunks} chunks, {elapsed:.1f}s")
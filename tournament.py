@@ -0,0 +1,108 @@
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import GROUPS, Config, Simulation, parse_setting
+
+def run_match(seed, config=None, max_ticks=20000, sample_every=10, strategic=False):
+    """Play one headless match and return its winner, length and population curve.
+
+    The population curve holds the per-group counts every sample_every
+    ticks, plus the final counts.
+    """
+    config = config or Config()
+    sim = Simulation(seed, strategic, config)
+    populations = [sim.dots.populations().tolist()]
+    while sim.ticks < max_ticks and not sim.winner:
+        sim.step()
+        if sim.ticks % sample_every == 0 or sim.winner:
+            populations.append(sim.dots.populations().tolist())
+
+    return {
+        'seed': seed,
+        'config': config.asdict(),
+        'strategic': strategic,
+        'winner': sim.winner,
+        'ticks': sim.ticks,
+        'populations': populations,
+    }
+
+class TournamentResults:
+    """Running totals over match results, updated as each one arrives."""
+
+    def __init__(self):
+        self.matches = 0
+        self.wins = {group: 0 for group in GROUPS}
+        self.undecided = 0
+        self.total_ticks = 0
+
+    def add(self, result):
+        self.matches += 1
+        self.total_ticks += result['ticks']
+        if result['winner']:
+            self.wins[result['winner']] += 1
+        else:
+            self.undecided += 1
+
+    def win_probabilities(self):
+        """Return {group: (probability, standard error)} over the matches so far."""
+        estimates = {}
+        for group, wins in self.wins.items():
+            p = wins / self.matches if self.matches else 0.0
+            stderr = math.sqrt(p * (1 - p) / self.matches) if self.matches else 0.0
+            estimates[group] = (p, stderr)
+        return estimates
+
+    def summary(self):
+        mean_ticks = self.total_ticks / self.matches if self.matches else 0
+        parts = [f"{group}: {p:.3f}±{stderr:.3f}" for group, (p, stderr) in self.win_probabilities().items()]
+        return (f"{self.matches} matches, " + ", ".join(parts) +
+                f", undecided: {self.undecided}, mean length: {mean_ticks:.0f} ticks")
+
+def run_tournament(matches, seed=0, config=None, max_ticks=20000, sample_every=10, workers=None, strategic=False):
+    """Play `matches` independent matches in a process pool, yielding results as they finish.
+
+    Match i is seeded with seed + i, so any single match can be replayed
+    with Simulation(seed + i). Results arrive in completion order.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_match, seed + i, config, max_ticks, sample_every, strategic)
+                   for i in range(matches)]
+        for future in as_completed(futures):
+            yield future.result()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Estimate win probabilities of Scissors (A), Paper (B) and Rock (C) over many headless matches.")
+    parser.add_argument('--matches', type=int, default=100, help="number of matches to play")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first match; match i uses seed + i")
+    parser.add_argument('--max-ticks', type=int, default=20000, help="give up on a match after this many ticks")
+    parser.add_argument('--sample-every', type=int, default=10, help="ticks between population samples")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument('--set', type=parse_setting, action='append', default=[], metavar='NAME=VALUE',
+                        help="change a rule, e.g. --set flee_threshold=200")
+    parser.add_argument('--strategic', action='store_true', help="use the strategic movement rules")
+    parser.add_argument('--output', help="write every match result as a JSON line to this file")
+    args = parser.parse_args()
+
+    results = TournamentResults()
+    output = open(args.output, 'w') if args.output else None
+    start = time.perf_counter()
+    try:
+        for result in run_tournament(args.matches, args.seed, Config(**dict(args.set)), args.max_ticks,
+                                     args.sample_every, args.workers, args.strategic):
+            results.add(result)
+            if output:
+                output.write(json.dumps(result) + '\n')
+            if results.matches % max(1, args.matches // 20) == 0:
+                print(results.summary(), flush=True)
+    finally:
+        if output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done in {elapsed:.1f}s ({results.matches / elapsed * 3600:.0f} matches/hour, "
+          f"{results.total_ticks / elapsed:.0f} ticks/s)")